@@ -1,48 +1,163 @@
+import sys
 from typing import Final
 from serial import Serial
 
 import numpy as np
-from numpy import uint8
+from numpy import intp, uint8, uint64
 from numpy.typing import NDArray
 
 from print_mech_analyser.printout import Printout
-from print_mech_analyser.analyser.protocol import Command, Repsonse, FrameProtocol
+from print_mech_analyser.analyser.protocol import Command, Repsonse, extract_frames
 
 HEAD_WIDTH: Final[int] = 384
+LINE_BYTES: Final[int] = HEAD_WIDTH // 8
+LINE_WORDS: Final[int] = LINE_BYTES // 8
+
+# Size of the OS receive buffer, large enough to ride out stalls in the UI.
+RX_BUFFER_SIZE: Final[int] = 1 << 20
+
+# Offsets of the line data within a BurnLine frame, in dot order.
+LINE_OFFSETS: Final[NDArray[intp]] = np.arange(LINE_BYTES, 0, -1)
+
+# Expands a byte of line data into its 8 dots, most significant bit first.
+DOT_LUT: Final[NDArray[uint8]] = np.multiply(
+    np.unpackbits(np.arange(256, dtype=uint8)[:, np.newaxis], axis=1), 255, dtype=uint8
+)
+
+
+def unpack_lines(lines: NDArray[uint8]) -> NDArray[uint8]:
+    """
+    Description
+    -----------
+    Expand packed lines, 1 bit per dot, into an image with 1 byte per dot.
+
+    """
+    return DOT_LUT[lines].reshape(-1, HEAD_WIDTH)
 
 
 class PrintoutBuilder:
+    _INITIAL_CAPACITY: Final[int] = 256
+
     def __init__(self) -> None:
-        self._image: list[NDArray[uint8]] = [np.zeros(HEAD_WIDTH).astype(uint8)]
+        # Lines are stored packed, 1 bit per dot, so burning one is just a few ORs.
+        # The image starts at line _head of the buffer, leaving room to add lines
+        # to the top of it without moving the rest.
+        self._image: NDArray[uint64] = np.zeros(
+            (self._INITIAL_CAPACITY, LINE_WORDS), dtype=uint64
+        )
+        self._head: int = self._INITIAL_CAPACITY // 4
+        self._length: int = 1
         self._line: int = 0
 
+    def _reserve(self, prepend: int, length: int) -> None:
+        """
+        Description
+        -----------
+        Ensure the buffer has room for a number of new lines ahead of the image and
+        for the image to then be the given length. Lines outside of the image are kept
+        zeroed.
+
+        When the buffer has to be reallocated, it's sized to at least double the new
+        length with a quarter of the spare space placed ahead of the image, so both
+        advancing and reversing are amortised O(1).
+
+        """
+        capacity: int = self._image.shape[0]
+        if prepend <= self._head and self._head - prepend + length <= capacity:
+            return
+
+        while capacity < length * 2:
+            capacity *= 2
+
+        head: int = prepend + (capacity - length) // 4
+
+        image = np.zeros((capacity, LINE_WORDS), dtype=uint64)
+        image[head : head + self._length] = self._image[self._lines]
+        self._image = image
+        self._head = head
+
+    @property
+    def _lines(self) -> slice:
+        return slice(self._head, self._head + self._length)
+
     def line_advance(self) -> None:
         self._line += 1
 
-        if self._line >= len(self._image):
-            self._image.append(np.zeros(HEAD_WIDTH).astype(uint8))
+        if self._line >= self._length:
+            self._reserve(0, self._length + 1)
+            self._length += 1
 
     def line_reverse(self) -> None:
-        if self._line == 0:
-            self._image.insert(0, np.zeros(HEAD_WIDTH).astype(uint8))
-        else:
+        if self._line != 0:
             self._line -= 1
+            return
 
-    def burn_line(self, line: NDArray[uint8]) -> None:
-        self._image[self._line] = np.bitwise_or(
-            self._image[self._line], line, dtype=uint8
-        )
-
-    def get_image(self) -> NDArray[uint8] | None:
-        if len(self._image) <= 1:
+        # Add a new first line.
+        self._reserve(1, self._length + 1)
+        self._head -= 1
+        self._length += 1
+
+    def burn_line(self, line: NDArray[uint64]) -> None:
+        row: NDArray[uint64] = self._image[self._head + self._line]
+        np.bitwise_or(row, line, out=row)
+
+    def apply(
+        self, moves: NDArray[intp], burns: NDArray[intp], lines: NDArray[uint64]
+    ) -> None:
+        """
+        Description
+        -----------
+        Apply a batch of steps in one go. Equivalent to calling line_advance,
+        line_reverse and burn_line for each step in turn.
+
+        Parameters
+        ----------
+        moves: NDArray[intp]
+            Line movement of each step. 1 to advance, -1 to reverse and 0 otherwise.
+
+        burns: NDArray[intp]
+            Indices of the steps which burn a line.
+
+        lines: NDArray[uint64]
+            Packed line to burn for each of the burn steps.
+
+        """
+        positions: NDArray[intp] = self._line + np.cumsum(moves)
+
+        # Reversing past the first line adds new lines to the top of the image.
+        prepend: int = max(-int(positions.min()), 0)
+        length: int = max(self._length, int(positions.max()) + 1) + prepend
+
+        self._reserve(prepend, length)
+        self._head -= prepend
+        self._length = length
+        self._line = int(positions[-1]) + prepend
+
+        rows: NDArray[intp] = positions[burns] + (self._head + prepend)
+        np.bitwise_or.at(self._image, rows, lines)
+
+    def get_lines(self) -> NDArray[uint8] | None:
+        """
+        Description
+        -----------
+        Get a copy of every completed line of the image, still packed.
+
+        """
+        if self._length <= 1:
             return None
 
-        image = np.vstack((self._image[:-1]), dtype=uint8)
-        return np.multiply(image, 255, dtype=uint8)
+        completed: NDArray[uint64] = self._image[
+            self._head : self._head + self._length - 1
+        ]
+        return completed.view(uint8).copy()
 
     def clear(self) -> None:
-        self._image: list[NDArray[uint8]] = [self._image[-1]]
-        self._line: int = 0
+        last: NDArray[uint64] = self._image[self._head + self._length - 1].copy()
+
+        self._image[self._lines] = 0
+        self._image[self._head] = last
+        self._length = 1
+        self._line = 0
 
 
 class PrintMechAnalyser:
@@ -51,6 +166,10 @@ class PrintMechAnalyser:
         self._data: bytearray = bytearray()
         self._printout: PrintoutBuilder = PrintoutBuilder()
 
+        # Only supported on Windows.
+        if sys.platform == "win32":
+            self._serial.set_buffer_size(rx_size=RX_BUFFER_SIZE)
+
     def set_paper_in(self) -> None:
         self._serial.write(Command.SetPaperIn.to_bytes())
 
@@ -70,48 +189,68 @@ class PrintMechAnalyser:
         self._serial.write(Command.RecordingStop.to_bytes())
 
     def process(self) -> None:
-        new_data: bytes | None = self._serial.read_all()
+        """
+        Description
+        -----------
+        Read any data waiting on the serial port and add it to the printout.
+
+        This is bound by interpreter overhead rather than by computation or memory
+        bandwidth, so the work is done in a fixed number of NumPy operations per read
+        instead of per byte or per frame. Only the control bytes found by
+        extract_frames are walked in Python.
+
+        """
+        waiting: int = self._serial.in_waiting
+        if waiting == 0:
+            return
 
-        if new_data is None or len(new_data) == 0:
+        new_data: bytes = self._serial.read(waiting)
+
+        self._data.extend(new_data)
+
+        # Process data into frames, keeping any incomplete frame for next time.
+        with memoryview(self._data) as data:
+            frames, consumed = extract_frames(data)
+
+        del self._data[:consumed]
+
+        if len(frames) == 0:
             return
 
-        data: bytes = self._data + new_data
-        self._data.clear()
+        # Process frames into printout, all at once. Frames are joined together so
+        # their commands and line data can be picked out without per-frame work.
+        contents = np.frombuffer(b"".join(frames), dtype=uint8)
+        lengths = np.fromiter(map(len, frames), dtype=intp, count=len(frames))
+        starts: NDArray[intp] = np.cumsum(lengths) - lengths
 
-        # Process data into frames.
-        parser = FrameProtocol()
-        frames: list[bytes] = []
+        commands = np.zeros(len(frames), dtype=uint8)
+        commands[lengths > 0] = contents[starts[lengths > 0]]
 
-        for byte in data:
-            frame = parser.process_byte(byte)
-            self._data.append(byte)
+        moves: NDArray[intp] = (commands == Repsonse.MotorAdvance).astype(intp)
+        moves -= commands == Repsonse.MotorReverse
 
-            if frame is not None:
-                frames.append(frame)
-                self._data.clear()
+        burns: NDArray[intp] = np.flatnonzero(
+            (commands == Repsonse.BurnLine) & (lengths == LINE_BYTES + 1)
+        )
 
-        # Process frames into printout
-        for frame in frames:
-            if frame.startswith(bytes([Repsonse.MotorAdvance])):
-                self._printout.line_advance()
+        # Line data is sent last byte first.
+        line_bytes = contents[starts[burns, np.newaxis] + LINE_OFFSETS]
+        lines: NDArray[uint64] = line_bytes.view(uint64)
 
-            if frame.startswith(bytes([Repsonse.MotorReverse])):
-                self._printout.line_reverse()
+        self._printout.apply(moves, burns, lines)
 
-            if frame.startswith(bytes([Repsonse.BurnLine])):
-                line_data = bytearray(frame.removeprefix(bytes([Repsonse.BurnLine])))
-                line_data.reverse()
-                data_bytes = [uint8(byte) for byte in line_data]
+    def get_lines(self) -> NDArray[uint8] | None:
+        return self._printout.get_lines()
 
-                line: NDArray[uint8] = np.array(data_bytes, dtype=uint8)
-                line = np.unpackbits(line, bitorder="big")
-                self._printout.burn_line(line)
+    def take_lines(self) -> NDArray[uint8] | None:
+        lines = self._printout.get_lines()
+        self._printout.clear()
+        return lines
 
     def get_printout(self) -> Printout | None:
-        image = self._printout.get_image()
-        return Printout(image) if image is not None else None
+        lines = self.get_lines()
+        return Printout(unpack_lines(lines)) if lines is not None else None
 
     def take_printout(self) -> Printout | None:
-        image = self._printout.get_image()
-        self._printout.clear()
-        return Printout(image) if image is not None else None
+        lines = self.take_lines()
+        return Printout(unpack_lines(lines)) if lines is not None else None
@@ -1,4 +1,9 @@
-from enum import Enum, IntEnum, auto
+import re
+from enum import IntEnum
+from typing import Final
+
+import numpy as np
+from numpy import uint8
 
 
 class ByteCode(IntEnum):
@@ -7,6 +12,16 @@ class ByteCode(IntEnum):
     ESCAPE = 0x1B
 
 
+# Plain int copies of the byte codes, which are much quicker to compare against than
+# enum members.
+FRAME_START: Final[int] = ByteCode.FRAME_START.value
+FRAME_END: Final[int] = ByteCode.FRAME_END.value
+ESCAPE: Final[int] = ByteCode.ESCAPE.value
+
+# Matches an escape byte along with the literal byte following it.
+ESCAPE_SEQUENCE: Final = re.compile(rb"\x1b(.)", re.DOTALL)
+
+
 class Command(IntEnum):
     Poll = ord("P")
 
@@ -19,8 +34,17 @@ class Command(IntEnum):
     RecordingStart = ord("R")
     RecordingStop = ord("r")
 
+    _frame: bytes
+
     def to_bytes(self) -> bytes:
-        return bytes([ByteCode.FRAME_START, self, ByteCode.FRAME_END])
+        return self._frame
+
+
+# Commands never change so build each of their frames once, up front.
+for command in Command:
+    command._frame = bytes([FRAME_START, command, FRAME_END])
+
+del command
 
 
 class Repsonse(IntEnum):
@@ -31,40 +55,62 @@ class Repsonse(IntEnum):
     BurnLine = ord("U")
 
 
-class FrameProtocol:
-    class State(Enum):
-        Idle = auto()
-        Processing = auto()
+def extract_frames(data: bytes | memoryview) -> tuple[list[bytes], int]:
+    """
+    Description
+    -----------
+    Extract every complete frame from a buffer of received bytes.
+
+    Rather than stepping through the buffer a byte at a time, the positions of the
+    control bytes are found with NumPy and only those are walked in Python.
+
+    Parameters
+    ----------
+    data: bytes | memoryview
+        Received bytes, starting outside of any frame.
+
+    Returns
+    -------
+    tuple[list[bytes], int]
+        The de-escaped frames and the number of bytes consumed. Any bytes past
+        that point belong to an incomplete frame.
+
+    """
+    array = np.frombuffer(data, dtype=uint8)
+    controls = np.flatnonzero(
+        (array == FRAME_START) | (array == FRAME_END) | (array == ESCAPE)
+    )
+
+    frames: list[bytes] = []
+    frame_start: int | None = None
+    has_escapes: bool = False
+    escaped: int = -1
 
-    def __init__(self) -> None:
-        self.state: FrameProtocol.State = self.State.Idle
-        self.escape_next: bool = False
-        self.frame_buffer: bytearray = bytearray()
+    for index in controls.tolist():
+        byte = data[index]
 
-    def process_byte(self, byte: int) -> bytes | None:
-        if self.state == FrameProtocol.State.Idle:
-            if byte == ByteCode.FRAME_START:
-                self.frame_buffer.clear()
-                self.state = FrameProtocol.State.Processing
-            return None
+        if frame_start is None:
+            if byte == FRAME_START:
+                frame_start = index
+                has_escapes = False
+            continue
 
         # Processing.
-        if self.escape_next:
-            self.frame_buffer.append(byte)
-            self.escape_next = False
-            return None
+        if index == escaped:
+            continue
 
-        if byte == ByteCode.ESCAPE:
-            self.escape_next = True
-            return None
+        if byte == ESCAPE:
+            has_escapes = True
+            escaped = index + 1
+            continue
 
-        if byte == ByteCode.FRAME_START:
-            self.state = FrameProtocol.State.Idle
-            return None
+        if byte == FRAME_END:
+            frame = bytes(data[frame_start + 1 : index])
+            if has_escapes:
+                frame = ESCAPE_SEQUENCE.sub(rb"\1", frame)
+            frames.append(frame)
 
-        if byte == ByteCode.FRAME_END:
-            self.state = FrameProtocol.State.Idle
-            return bytes(self.frame_buffer)
+        frame_start = None
 
-        self.frame_buffer.append(byte)
-        return None
+    consumed: int = len(data) if frame_start is None else frame_start
+    return frames, consumed
@@ -3,10 +3,30 @@ from typing import Final, Self
 from serial import Serial
 from dataclasses import dataclass
 from multiprocessing import Process, Queue
-
-from print_mech_analyser.analyser.analyser import PrintMechAnalyser
+from queue import Empty
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+from numpy import uint8
+from numpy.typing import NDArray
+
+from print_mech_analyser.analyser.analyser import (
+    PrintMechAnalyser,
+    LINE_BYTES,
+    unpack_lines,
+)
 from print_mech_analyser.printout import Printout
 
+# Number of lines that can be passed back through shared memory. Longer printouts
+# are sent through the queue instead.
+SHARED_LINES: Final[int] = 32768
+
+# How long the server waits for a request before checking the serial port again.
+REQUEST_TIMEOUT: Final[float] = 0.01
+
+# How long the server is given to exit once asked before it's killed.
+STOP_TIMEOUT: Final[float] = 1.0
+
 
 class Request(Enum):
     EXIT = auto()
@@ -29,22 +49,43 @@ class PrintMechAnalyserServer:
 
     requests: Queue
     printout: Queue
+    image: SharedMemory
 
     @classmethod
     def start(cls, serial: Serial) -> Self:
         requests: Queue = Queue()
         printout: Queue = Queue()
+        image = SharedMemory(create=True, size=SHARED_LINES * LINE_BYTES)
 
-        process = Process(target=cls._run, args=[serial.name, requests, printout])
+        process = Process(
+            target=cls._run, args=[serial.name, requests, printout, image.name]
+        )
         process.start()
 
-        return cls(process=process, requests=requests, printout=printout)
+        return cls(process=process, requests=requests, printout=printout, image=image)
 
     def stop(self) -> None:
+        # The server may still be writing to the shared memory, so wait for it to exit
+        # before releasing it.
         self.requests.put(Request.EXIT)
+        self.process.join(STOP_TIMEOUT)
+        if self.process.is_alive():
+            self.kill()
+            return
+
+        self._release_image()
 
     def kill(self) -> None:
         self.process.kill()
+        self.process.join()
+        self._release_image()
+
+    def _release_image(self) -> None:
+        if self.image.buf is None:
+            return
+
+        self.image.close()
+        self.image.unlink()
 
     def set_paper_in(self) -> None:
         self.requests.put(Request.SET_PAPER_IN)
@@ -66,42 +107,89 @@ class PrintMechAnalyserServer:
 
     def get_printout(self) -> Printout | None:
         self.requests.put(Request.PRINTOUT_GET)
-        return self.printout.get()
+        return self._receive_printout()
 
     def take_printout(self) -> Printout | None:
         self.requests.put(Request.PRINTOUT_TAKE)
-        return self.printout.get()
+        return self._receive_printout()
 
     def clear_printout(self) -> None:
         self.requests.put(Request.PRINTOUT_TAKE)
         self.printout.get()
 
+    def _receive_printout(self) -> Printout | None:
+        """
+        Description
+        -----------
+        Receive a printout from the server process. Lines are sent packed, 1 bit per
+        dot, and only unpacked here. Those that fit are written to shared memory and
+        only their count is sent through the queue.
+
+        """
+        response: NDArray[uint8] | int | None = self.printout.get()
+        if response is None:
+            return None
+
+        if not isinstance(response, int):
+            return Printout(unpack_lines(response))
+
+        lines = np.ndarray((response, LINE_BYTES), dtype=uint8, buffer=self.image.buf)
+        return Printout(unpack_lines(lines))
+
     @staticmethod
-    def _run(port: str, requests: Queue, printout: Queue) -> None:
+    def _send_lines(
+        printout: Queue, image: SharedMemory, lines: NDArray[uint8] | None
+    ) -> None:
+        if lines is None or len(lines) > SHARED_LINES:
+            printout.put(lines)
+            return
+
+        shared = np.ndarray(lines.shape, dtype=uint8, buffer=image.buf)
+        shared[:] = lines
+        printout.put(len(lines))
+
+    @staticmethod
+    def _run(port: str, requests: Queue, printout: Queue, image_name: str) -> None:
         analyser: Final = PrintMechAnalyser(Serial(port, baudrate=230400))
+        image: Final = SharedMemory(name=image_name)
+        send: Final = PrintMechAnalyserServer._send_lines
 
-        while True:
+        running: bool = True
+        while running:
             analyser.process()
 
-            if requests.empty():
+            try:
+                pending: list[Request] = [requests.get(timeout=REQUEST_TIMEOUT)]
+            except Empty:
                 continue
 
-            match (requests.get()):
-                case Request.EXIT:
+            # Handle everything else that's queued up before reading the port again.
+            while True:
+                try:
+                    pending.append(requests.get_nowait())
+                except Empty:
                     break
-                case Request.SET_PAPER_IN:
-                    analyser.set_paper_in()
-                case Request.SET_PAPER_OUT:
-                    analyser.set_paper_out()
-                case Request.SET_PLATEN_IN:
-                    analyser.set_platen_in()
-                case Request.SET_PLATEN_OUT:
-                    analyser.set_platen_out()
-                case Request.RECORDING_START:
-                    analyser.start_capture()
-                case Request.RECORDING_STOP:
-                    analyser.stop_capture()
-                case Request.PRINTOUT_GET:
-                    printout.put(analyser.get_printout())
-                case Request.PRINTOUT_TAKE:
-                    printout.put(analyser.take_printout())
+
+            for request in pending:
+                match request:
+                    case Request.EXIT:
+                        running = False
+                        break
+                    case Request.SET_PAPER_IN:
+                        analyser.set_paper_in()
+                    case Request.SET_PAPER_OUT:
+                        analyser.set_paper_out()
+                    case Request.SET_PLATEN_IN:
+                        analyser.set_platen_in()
+                    case Request.SET_PLATEN_OUT:
+                        analyser.set_platen_out()
+                    case Request.RECORDING_START:
+                        analyser.start_capture()
+                    case Request.RECORDING_STOP:
+                        analyser.stop_capture()
+                    case Request.PRINTOUT_GET:
+                        send(printout, image, analyser.get_lines())
+                    case Request.PRINTOUT_TAKE:
+                        send(printout, image, analyser.take_lines())
+
+        image.close()
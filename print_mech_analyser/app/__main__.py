@@ -1,5 +1,9 @@
+import logging
+
 from print_mech_analyser.app import App
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+
     app = App()
     app.mainloop()
@@ -1,9 +1,12 @@
+import functools
+import logging
 import time
 import tkinter
 from pathlib import Path
-from tkinter import Tk, Menu
+from tkinter import Tk, Menu, Event
 from tkinter import filedialog
-from typing import Final
+from typing import Callable, Final
+from concurrent.futures import Future, ThreadPoolExecutor
 from serial import Serial
 
 from print_mech_analyser.analyser import PrintMechAnalyserServer
@@ -13,9 +16,35 @@ from print_mech_analyser.font import Font
 from print_mech_analyser.app.display import Display
 from print_mech_analyser.app.controls import Controls, PortMenu
 
+logger: Final = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=None)
+def load_fonts(filepath: Path) -> tuple[Font, Font]:
+    """
+    Description
+    -----------
+    Load a font and its bold variant. Fonts are cached so each is only parsed and
+    made bold once per run.
+
+    """
+    font: Final = Font.from_json(filepath)
+    return font, font.into_bold()
+
 
 class App:
     _REFRESH_RATE: Final[int] = 50
+    _IDLE_REFRESH_RATE: Final[int] = 250
+
+    # Requests sent to the analyser when each virtual event is generated.
+    _EVENT_REQUESTS: Final[dict[str, Callable[[PrintMechAnalyserServer], None]]] = {
+        "<<record-start>>": PrintMechAnalyserServer.start_capture,
+        "<<record-stop>>": PrintMechAnalyserServer.stop_capture,
+        "<<paper-in>>": PrintMechAnalyserServer.set_paper_in,
+        "<<paper-out>>": PrintMechAnalyserServer.set_paper_out,
+        "<<platen-in>>": PrintMechAnalyserServer.set_platen_in,
+        "<<platen-out>>": PrintMechAnalyserServer.set_platen_out,
+    }
 
     def __init__(self) -> None:
         self._root: Final = Tk()
@@ -26,6 +55,9 @@ class App:
         )
 
         self._analyser: PrintMechAnalyserServer | None = None
+        self._opening: Future[PrintMechAnalyserServer] | None = None
+        self._executor: Final = ThreadPoolExecutor(max_workers=1)
+        self._refresh_rate: int = self._REFRESH_RATE
 
         self._root.title("Print Mech Analyser")
 
@@ -51,54 +83,106 @@ class App:
         self._controls.grid(row=0, column=0, sticky="nsew")
         self._display.grid(row=0, column=1, sticky="nsew", rowspan=2)
 
-        self._root.bind(
-            "<<record-start>>",
-            lambda _: self._analyser.start_capture() if self._analyser else ...,
-        )
-        self._root.bind(
-            "<<record-stop>>",
-            lambda _: self._analyser.stop_capture() if self._analyser else ...,
-        )
-        self._root.bind(
-            "<<paper-in>>",
-            lambda _: self._analyser.set_paper_in() if self._analyser else ...,
-        )
-        self._root.bind(
-            "<<paper-out>>",
-            lambda _: self._analyser.set_paper_out() if self._analyser else ...,
-        )
-        self._root.bind(
-            "<<platen-in>>",
-            lambda _: self._analyser.set_platen_in() if self._analyser else ...,
-        )
-        self._root.bind(
-            "<<platen-out>>",
-            lambda _: self._analyser.set_platen_out() if self._analyser else ...,
+        for event, request in self._EVENT_REQUESTS.items():
+            self._root.bind(event, functools.partial(self._send_request, request))
+
+        # Load the fonts in the background so the window appears straight away. Loading
+        # printouts waits until they're ready.
+        self._menubar.entryconfig("Load", state=tkinter.DISABLED)
+        self._loading_fonts: Future[tuple[Font, Font]] | None = self._executor.submit(
+            load_fonts, Path("./fonts/Arial16.json")
         )
 
         self.update_printout()
 
-        arial16 = Font.from_json(Path("./fonts/Arial16.json"))
-        fonts: list[Font] = [arial16, arial16.into_bold()]
-        self._display.set_fonts(fonts)
-
     def mainloop(self) -> None:
         self._root.mainloop()
+        self._executor.shutdown()
+
+        if self._opening is not None and self._opening.exception() is None:
+            self._opening.result().stop()
 
         if self._analyser is not None:
             self._analyser.stop()
 
+    def _send_request(
+        self, request: Callable[[PrintMechAnalyserServer], None], _: Event
+    ) -> None:
+        if self._analyser is not None:
+            request(self._analyser)
+
     def select_analyser(self, port: str) -> None:
-        self._analyser = PrintMechAnalyserServer.start(Serial(port, baudrate=230400))
+        """
+        Description
+        -----------
+        Start an analyser on the given port. Opening the port and starting the server
+        process can take hundreds of milliseconds, so it's done on a worker thread and
+        picked up by update_printout once complete. The port menu is disabled until
+        then.
+
+        """
+        if self._opening is not None:
+            return
+
+        self._menubar.entryconfig("Select Port", state=tkinter.DISABLED)
+        self._opening = self._executor.submit(
+            lambda: PrintMechAnalyserServer.start(Serial(port, baudrate=230400))
+        )
 
-    def update_printout(self) -> None:
-        self._root.after(self._REFRESH_RATE, self.update_printout)
+    def _take_opened_analyser(self) -> None:
+        if self._opening is None or not self._opening.done():
+            return
+
+        opening, self._opening = self._opening, None
+        self._menubar.entryconfig("Select Port", state=tkinter.NORMAL)
 
+        if opening.exception() is not None:
+            logger.error("Failed to open port: %s", opening.exception())
+            return
+
+        # Stopping waits for the server process to exit, so do it in the background.
         if self._analyser is not None:
+            self._executor.submit(self._analyser.stop)
+
+        self._analyser = opening.result()
+
+    def _take_loaded_fonts(self) -> None:
+        if self._loading_fonts is None or not self._loading_fonts.done():
+            return
+
+        loading, self._loading_fonts = self._loading_fonts, None
+        self._menubar.entryconfig("Load", state=tkinter.NORMAL)
+
+        if loading.exception() is not None:
+            logger.error("Failed to load fonts: %s", loading.exception())
+            return
+
+        self._display.set_fonts(list(loading.result()))
+
+    def update_printout(self) -> None:
+        """
+        Description
+        -----------
+        Append any new lines from the analyser to the display. While no new lines
+        arrive the refresh period backs off exponentially, up to the idle refresh rate,
+        and drops back to the normal rate as soon as lines arrive again. Lines are left
+        with the analyser until the fonts have loaded.
+
+        """
+        self._take_loaded_fonts()
+        self._take_opened_analyser()
+
+        printout = None
+        if self._analyser is not None and self._loading_fonts is None:
             printout = self._analyser.take_printout()
 
-            if printout is not None:
-                self._display.append(printout)
+        if printout is not None:
+            self._display.append(printout)
+            self._refresh_rate = self._REFRESH_RATE
+        else:
+            self._refresh_rate = min(2 * self._refresh_rate, self._IDLE_REFRESH_RATE)
+
+        self._root.after(self._refresh_rate, self.update_printout)
 
     def save_printout(self) -> None:
         filename = filedialog.asksaveasfilename(
@@ -116,9 +200,9 @@ class App:
 
         if filename is not None and len(filename) > 0:
             start: Final[float] = time.monotonic()
-            self._display.set(Printout.from_file(Path(filename)))
+            self._display.set(Printout.from_file(Path(filename)), cached=True)
             end: Final[float] = time.monotonic()
-            print(f"Loaded printout in {end - start}s")
+            logger.debug("Loaded printout in %.3fs", end - start)
 
     def clear_printout(self) -> None:
         self._display.clear()
@@ -1,23 +1,78 @@
-import functools
+import time
 import serial.tools.list_ports
-from tkinter import Tk, Frame, Button, Menu
+from concurrent.futures import Future, ThreadPoolExecutor
+from tkinter import Tk, Frame, Button, Menu, IntVar
 from typing import Final
 
 
 class PortMenu(Menu):
+    # How long an enumeration of the ports is used before it's refreshed.
+    _PORTS_TTL: Final[float] = 2.0
+
     def __init__(self, master=None, **kw) -> None:
         super().__init__(master=master, postcommand=self.refresh, **kw)
         self.port: str = ""
 
+        self._executor: Final = ThreadPoolExecutor(max_workers=1)
+        self._ports: list[str] | None = None
+        self._ports_time: float = 0.0
+        self._enumerating: Future[list[str]] | None = self._enumerate()
+
+        # Every entry shares one variable, set to the index of the selected port.
+        self._shown_ports: list[str] = []
+        self._selected: Final = IntVar(self, value=-1)
+        self._selected.trace_add("write", lambda *_: self._select())
+
+        # Set while the menu itself moves the selection, rather than the user.
+        self._syncing: bool = False
+
+    @staticmethod
+    def _list_ports() -> list[str]:
+        return [port.name for port in serial.tools.list_ports.comports()]
+
+    def _enumerate(self) -> Future[list[str]]:
+        return self._executor.submit(self._list_ports)
+
     def refresh(self) -> None:
-        self.delete(0, "end")
+        """
+        Description
+        -----------
+        Rebuild the menu from the most recent enumeration of the ports. Enumerating
+        the ports can take hundreds of milliseconds on Windows, so it's done on a
+        worker thread and the previous result is shown while a new one is running.
+        Only the very first refresh waits for an enumeration to complete.
+
+        """
+        enumerating = self._enumerating
+        if enumerating is not None and (enumerating.done() or self._ports is None):
+            self._enumerating = None
+            self._ports = enumerating.result()
+            self._ports_time = time.monotonic()
+
+        stale = time.monotonic() - self._ports_time > self._PORTS_TTL
+        if stale and self._enumerating is None:
+            self._enumerating = self._enumerate()
 
-        ports = [port.name for port in serial.tools.list_ports.comports()]
+        self.delete(0, "end")
 
-        for port in ports:
-            self.add_radiobutton(
-                label=port, command=functools.partial(self.port_selected, port)
-            )
+        self._shown_ports = self._ports or []
+        for i, port in enumerate(self._shown_ports):
+            self.add_radiobutton(label=port, variable=self._selected, value=i)
+
+        # Keep the selection on the selected port, which may have moved or gone.
+        selected = (
+            self._shown_ports.index(self.port) if self.port in self._shown_ports else -1
+        )
+        if self._selected.get() != selected:
+            self._syncing = True
+            try:
+                self._selected.set(selected)
+            finally:
+                self._syncing = False
+
+    def _select(self) -> None:
+        if not self._syncing:
+            self.port_selected(self._shown_ports[self._selected.get()])
 
     def port_selected(self, port: str) -> None:
         self.port = port
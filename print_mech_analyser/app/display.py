@@ -1,8 +1,12 @@
+import functools
 from pathlib import Path
 import tkinter
-from tkinter import Canvas, PhotoImage, Frame, Scrollbar, Event, Text
-from typing import Final
-from idlelib.tooltip import Hovertip
+import tkinter.font
+from tkinter import Canvas, PhotoImage, Frame, Scrollbar, Event, Text, Label
+from typing import Final, Iterator
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from idlelib.tooltip import TooltipBase
 
 import numpy as np
 from numpy import uint8
@@ -13,7 +17,8 @@ from print_mech_analyser.pretty_printout import PrettyPrintout
 from print_mech_analyser.font import Font
 from print_mech_analyser.parse import PrintoutDescriptor
 from print_mech_analyser.parse import WhiteSpace, UnknownSpace, GlyphSpace, GlyphMatch
-from print_mech_analyser.geometry import BoundingBox, Point
+from print_mech_analyser.parse import VerticalSpace
+from print_mech_analyser.geometry import BoundingBox, Point, Span
 
 # Tkinter uses RGB, not BGR.
 BLUE = (0, 0, 255)
@@ -26,43 +31,106 @@ SPACE_CHAR: Final = GlyphMatch(" ", "?", 0x20, 0, BoundingBox(Point(0, 0), Point
 UNKNOWN: Final = GlyphMatch("�", "?", 0x20, 0, BoundingBox(Point(0, 0), Point(0, 0)))
 
 
-def ndarray_to_photo_image(array: NDArray[uint8]) -> PhotoImage:
-    if len(array.shape) == 2:
-        height, width = array.shape
-        data = f"P5 {width} {height} 255 ".encode() + array.tobytes()
-    else:
-        height, width, _ = array.shape
-        data = f"P6 {width} {height} 255 ".encode() + array.tobytes()
+@functools.lru_cache(maxsize=16)
+def ppm_header(shape: tuple[int, ...]) -> bytes:
+    # Greyscale images are written as PGM and colour images as PPM.
+    if len(shape) == 2:
+        height, width = shape
+        return f"P5 {width} {height} 255 ".encode()
 
-    return PhotoImage(width=width, height=height, data=data, format="PPM")
+    height, width, _ = shape
+    return f"P6 {width} {height} 255 ".encode()
 
 
-def color_printout(printout: Printout, desc: PrintoutDescriptor) -> PrettyPrintout:
-    pretty = PrettyPrintout.from_printout(printout)
+def ndarray_to_ppm(array: NDArray[uint8]) -> bytes:
+    # Tk only accepts bytes, so join the header straight onto the pixel buffer to
+    # build the image data in a single copy.
+    array = np.ascontiguousarray(array, dtype=uint8)
+    return b"".join((ppm_header(array.shape), array.data))
 
-    vertspace = desc.contents
-    white_vertspace = [vs for vs in vertspace if vs.is_whitespace]
-    object_vertspace = [vs for vs in vertspace if (not vs.is_whitespace)]
 
-    [pretty.highlight_strip(vs.span, YELLOW) for vs in white_vertspace]
+def bbox_contains(bbox: tuple[int, int, int, int], x: int, y: int) -> bool:
+    # Tk boxes are given as (left, top, width, height).
+    left, top, width, height = bbox
+    return left <= x < left + width and top <= y < top + height
+
+
+def color_printout(
+    printout: Printout, contents: list[VerticalSpace], beg: int = 0
+) -> PrettyPrintout:
+    """
+    Description
+    -----------
+    Colour the rows of a printout from beg onward according to the space describing
+    them. The returned image starts at row beg.
+
+    """
+    pretty = PrettyPrintout.from_printout(printout[beg:])
+    offset: Final = Point(0, beg)
+
+    # Gather the areas to highlight in each colour so each is highlighted at once.
+    yellow: list[BoundingBox] = []
+    teal: list[BoundingBox] = []
+    red: list[BoundingBox] = []
+    blue: list[BoundingBox] = []
+    green: list[BoundingBox] = []
+
+    for vs in contents:
+        if vs.is_whitespace:
+            strip = Span(vs.span.beg - beg, vs.span.end - beg)
+            yellow.append(BoundingBox.from_spans(Span(0, pretty.width), strip))
+            continue
 
-    for vs in object_vertspace:
         horispace = [(hs, vs.get_bbox(i)) for i, hs in enumerate(vs.contents)]
+        horispace = [
+            (hs, BoundingBox(bbox.p1 - offset, bbox.p2 - offset))
+            for hs, bbox in horispace
+        ]
 
-        whitespace = [bbox for hs, bbox in horispace if type(hs) is WhiteSpace]
-        unknownspace = [bbox for hs, bbox in horispace if type(hs) is UnknownSpace]
         charspace = [bbox for hs, bbox in horispace if type(hs) is GlyphSpace]
 
-        [pretty.highlight_area(bbox, TEAL) for bbox in whitespace]
-        [pretty.highlight_area(bbox, RED) for bbox in unknownspace]
+        teal.extend(bbox for hs, bbox in horispace if type(hs) is WhiteSpace)
+        red.extend(bbox for hs, bbox in horispace if type(hs) is UnknownSpace)
+        blue.extend(charspace[0::2])
+        green.extend(charspace[1::2])
 
-        [pretty.highlight_area(bbox, BLUE) for bbox in charspace[0::2]]
-        [pretty.highlight_area(bbox, GREEN) for bbox in charspace[1::2]]
+    pretty.highlight_areas(yellow, YELLOW)
+    pretty.highlight_areas(teal, TEAL)
+    pretty.highlight_areas(red, RED)
+    pretty.highlight_areas(blue, BLUE)
+    pretty.highlight_areas(green, GREEN)
 
     return pretty
 
 
+def extend_descriptor(
+    descriptor: PrintoutDescriptor, extension: Printout
+) -> tuple[int, int, PrettyPrintout]:
+    """
+    Description
+    -----------
+    Extend a descriptor with a printout and colour the re-parsed part of it.
+
+    Returns
+    -------
+    tuple[int, int, PrettyPrintout]
+        Index of the first re-parsed vertical space, the row it begins on, and the
+        coloured printout from that row onward.
+
+    """
+    first: Final = len(descriptor.contents) - 1
+    beg: Final = descriptor.contents[first].span.beg
+
+    descriptor.extend(extension)
+
+    contents: Final = descriptor.contents[first:]
+    return first, beg, color_printout(descriptor.printout, contents, beg)
+
+
 class Display(Frame):
+    # How often, in milliseconds, a parse running in the background is checked.
+    _PARSE_POLL_RATE: Final[int] = 20
+
     def __init__(self, master=None, **kw):
         super().__init__(master=master, **kw)
 
@@ -73,6 +141,14 @@ class Display(Frame):
         self._descriptor: PrintoutDescriptor | None = None
         self._fonts: list[Font] = []
 
+        self._executor: Final = ThreadPoolExecutor(max_workers=1)
+        self._saving: Future[None] | None = None
+
+        # Appended printouts waiting to be parsed, and the parse in progress.
+        self._parser: Final = ThreadPoolExecutor(max_workers=1)
+        self._parsing: Future[tuple[int, int, PrettyPrintout]] | None = None
+        self._pending: list[Printout] = []
+
         self._print.grid(row=0, column=0, sticky="nsew")
         self._text.grid(row=0, column=1, sticky="nsew")
         self._scroll.grid(row=0, column=2, sticky="nsew")
@@ -93,50 +169,112 @@ class Display(Frame):
         self._fonts = fonts
 
     def append(self, printout: Printout) -> None:
-        if self._descriptor is None:
+        """
+        Description
+        -----------
+        Append a printout to the display. The new lines are shown straight away, then
+        parsed and coloured on a worker thread so the UI stays responsive. Printouts
+        appended while a parse is running are parsed together once it completes.
+
+        Extending the descriptor only re-parses from the start of its last vertical
+        space, so only the text and image from that space onward are replaced. The
+        cost of an append is proportional to the new lines, not the whole printout.
+
+        """
+        # The descriptor is being extended by the worker while a parse is running, so
+        # queue the printout rather than inspecting it.
+        if self._parsing is not None:
+            self._print.append(PrettyPrintout.from_printout(printout))
+            self._pending.append(printout)
+            return
+
+        if self._descriptor is None or len(self._descriptor.contents) == 0:
             self.set(printout)
             return
 
-        self.clear()
-        self._descriptor.extend(printout)
+        self._print.append(PrettyPrintout.from_printout(printout))
+        self._pending.append(printout)
+        self._start_parse()
 
-        pretty = color_printout(self._descriptor.printout, self._descriptor)
-        for vs in self._descriptor.contents:
-            for hs in vs.contents:
-                match hs:
-                    case WhiteSpace():
-                        self._text.append_character([SPACE_CHAR], 16)
-                    case GlyphSpace():
-                        self._text.append_character(hs.matches, 16)
-                    case UnknownSpace():
-                        self._text.append_character([UNKNOWN], 8)
+    def _start_parse(self) -> None:
+        if self._descriptor is None:
+            return
 
-            self._text.new_line()
+        extension: Final = Printout(np.vstack(self._pending))
+        self._pending.clear()
 
-        self._print.set(pretty)
+        self._parsing = self._parser.submit(
+            extend_descriptor, self._descriptor, extension
+        )
+        self.after(self._PARSE_POLL_RATE, self._finish_parse, self._parsing)
+
+    def _finish_parse(self, parsing: Future[tuple[int, int, PrettyPrintout]]) -> None:
+        # The display was cleared or set while parsing.
+        if parsing is not self._parsing or self._descriptor is None:
+            return
+
+        if not parsing.done():
+            self.after(self._PARSE_POLL_RATE, self._finish_parse, parsing)
+            return
+
+        self._parsing = None
+        first, beg, pretty = parsing.result()
+        contents: Final = self._descriptor.contents[first:]
+
+        with self._text.editing():
+            self._text.truncate(first)
+            self._append_text(contents)
 
-    def set(self, printout: Printout) -> None:
+        # Put back the unparsed lines appended since the parse started.
+        self._print.truncate(beg)
+        self._print.append(pretty)
+        for printout in self._pending:
+            self._print.append(PrettyPrintout.from_printout(printout))
+
+        if len(self._pending) != 0:
+            self._start_parse()
+
+    def set(self, printout: Printout, cached: bool = False) -> None:
         self.clear()
-        self._descriptor = PrintoutDescriptor.new(printout, self._fonts)
 
-        pretty = color_printout(printout, self._descriptor)
-        for vs in self._descriptor.contents:
+        # Printouts loaded from file are often reopened, so their parse may be cached.
+        if cached:
+            self._descriptor = PrintoutDescriptor.cached(printout, self._fonts)
+        else:
+            self._descriptor = PrintoutDescriptor.new(printout, self._fonts)
+
+        pretty = color_printout(printout, self._descriptor.contents)
+        self._append_text(self._descriptor.contents)
+        self._print.set(pretty)
+
+        # Save in the background. Only the latest printout matters, so a save that
+        # hasn't started yet is dropped in favour of this one.
+        if self._saving is not None:
+            self._saving.cancel()
+
+        self._saving = self._executor.submit(pretty.save, Path("parsed.png"))
+
+    def _append_text(self, contents: list[VerticalSpace]) -> None:
+        lines: list[list[tuple[list[GlyphMatch], int]]] = []
+        for vs in contents:
+            line: list[tuple[list[GlyphMatch], int]] = []
             for hs in vs.contents:
                 match hs:
                     case WhiteSpace():
-                        self._text.append_character([SPACE_CHAR], 16)
+                        line.append(([SPACE_CHAR], 16))
                     case GlyphSpace():
-                        self._text.append_character(hs.matches, 16)
+                        line.append((hs.matches, 16))
                     case UnknownSpace():
-                        self._text.append_character([UNKNOWN], 8)
+                        line.append(([UNKNOWN], 8))
 
-            self._text.new_line()
+            lines.append(line)
 
-        self._print.set(pretty)
-
-        pretty.save(Path("parsed.png"))
+        self._text.append_lines(lines)
 
     def clear(self) -> None:
+        self._descriptor = None
+        self._parsing = None
+        self._pending.clear()
         self._print.clear()
         self._text.clear()
 
@@ -158,40 +296,134 @@ class PrintDisplay(Frame):
 
         self._canvas: Final = Canvas(self, highlightthickness=0)
         self._image: NDArray[uint8] | None = None
+        self._buffer: NDArray[uint8] | None = None
         self._photo_image: PhotoImage | None = None
         self._canvas_image = self._canvas.create_image(0, 0, anchor="nw", image=None)
 
+        # Rows of the image currently drawn into the photo image.
+        self._rendered: tuple[int, int] = (0, 0)
+
         self.grid_rowconfigure(0, weight=1)
         self.grid_columnconfigure(0, weight=1)
 
         self._canvas.grid(row=0, column=0, sticky="ns")
-
-    def append(self, printout: Printout) -> None:
-        if self._image is None:
+        self._canvas.bind("<Configure>", lambda _: self._render())
+
+    def append(self, printout: Printout | PrettyPrintout) -> None:
+        """
+        Description
+        -----------
+        Append a printout to the bottom of the image. Rows are copied into a buffer
+        which grows geometrically, so appending doesn't reallocate the whole image
+        each time. The displayed image is a contiguous view of the buffer's filled
+        rows.
+
+        """
+        if self._image is None or self._buffer is None:
             self.set(printout)
             return
 
-        self._image = np.vstack((self._image, printout))
+        rows = np.asarray(printout, dtype=uint8)
+        beg = self._image.shape[0]
+        end = beg + rows.shape[0]
 
-        self._photo_image = ndarray_to_photo_image(self._image)
+        if end > self._buffer.shape[0]:
+            buffer = np.empty((2 * end, *self._buffer.shape[1:]), dtype=uint8)
+            buffer[:beg] = self._image
+            self._buffer = buffer
 
-        self._canvas.itemconfig(self._canvas_image, image=self._photo_image)
-        self._canvas.config(scrollregion=self._canvas.bbox("all"))
+        self._buffer[beg:end] = rows
+        self._image = self._buffer[:end]
+        self._set_scrollregion()
+        self._render()
 
     def set(self, printout: Printout | PrettyPrintout) -> None:
-        self._image = np.array(printout, dtype=uint8)
+        self._buffer = np.array(printout, dtype=uint8, order="C")
+        self._image = self._buffer
+        self._rendered = (0, 0)
+        self._set_scrollregion()
+        self._render()
+
+    def truncate(self, length: int) -> None:
+        """
+        Description
+        -----------
+        Drop every row of the image from the given row onward.
+
+        """
+        if self._image is None or length >= self._image.shape[0]:
+            return
 
-        self._photo_image = ndarray_to_photo_image(self._image)
+        self._image = self._image[:length]
+        beg, end = self._rendered
+        self._rendered = (beg, min(end, length))
+
+    def _set_scrollregion(self) -> None:
+        if self._image is not None:
+            height, width = self._image.shape[:2]
+            self._canvas.config(scrollregion=(0, 0, width, height))
+
+    def _render(self) -> None:
+        """
+        Description
+        -----------
+        Render the rows of the image currently scrolled into view. Only those rows are
+        drawn so the cost of a redraw doesn't grow with the length of the printout.
+        The same photo image is reused and, if the view hasn't moved, only rows
+        appended since the last redraw are drawn.
+
+        """
+        if self._image is None:
+            return
 
-        self._canvas.itemconfig(self._canvas_image, image=self._photo_image)
-        self._canvas.config(scrollregion=self._canvas.bbox("all"))
+        height: int = self._canvas.winfo_height() + 1
+        width: int = self._image.shape[1]
+
+        beg: int = max(int(self._canvas.canvasy(0)), 0)
+        end: int = min(beg + height, self._image.shape[0])
+        if end <= beg:
+            return
+
+        # The photo image is attached to the canvas once and resized in place, which
+        # keeps any rows already drawn into it.
+        photo_image = self._photo_image
+        if photo_image is None:
+            photo_image = PhotoImage(width=width, height=height)
+            self._photo_image = photo_image
+            self._canvas.itemconfig(self._canvas_image, image=photo_image)
+            self._rendered = (0, 0)
+        elif photo_image.width() != width:
+            photo_image.configure(width=width, height=height)
+            self._rendered = (0, 0)
+        elif photo_image.height() != height:
+            photo_image.configure(height=height)
+            rendered_beg, rendered_end = self._rendered
+            self._rendered = (rendered_beg, min(rendered_end, rendered_beg + height))
+
+        rendered_beg, rendered_end = self._rendered
+        first: int = rendered_end if rendered_beg == beg and rendered_end > 0 else beg
+
+        if first == beg:
+            photo_image.blank()
+
+        if first < end:
+            data = ndarray_to_ppm(self._image[first:end])
+            photo_image.put(data, to=(0, first - beg))
+
+        self._rendered = (beg, end)
+        self._canvas.coords(self._canvas_image, 0, beg)
 
     def clear(self) -> None:
-        self._canvas.delete("all")
         self._image = None
-        self._photo_image = None
-        self._canvas_image = self._canvas.create_image(0, 0, anchor="nw", image=None)
-        self._canvas.config(scrollregion=self._canvas.bbox("all"))
+        self._buffer = None
+        self._rendered = (0, 0)
+
+        # Keep the canvas item and photo image for the next printout.
+        if self._photo_image is not None:
+            self._photo_image.blank()
+
+        self._canvas.coords(self._canvas_image, 0, 0)
+        self._canvas.config(scrollregion=(0, 0, 0, 0))
 
     def get_printout(self) -> Printout | None:
         return Printout(self._image) if self._image is not None else None
@@ -201,9 +433,11 @@ class PrintDisplay(Frame):
 
     def yview(self, *args) -> None:
         self._canvas.yview(*args)
+        self._render()
 
     def scroll(self, event: Event):
         self._canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")  # For windows
+        self._render()
 
 
 class TextDisplay(Frame):
@@ -211,77 +445,259 @@ class TextDisplay(Frame):
         super().__init__(master=master, **kw)
 
         self._text: list[list[GlyphMatch] | None] = []
+        self._line_starts: list[int] = [0]
         self._text_box: Final = Text(self)
-        self._tooltip: ToolTip = ToolTip(self, "")
+        self._tooltip: ToolTip | None = None
 
         self.grid_rowconfigure(0, weight=1)
         self.grid_columnconfigure(0, weight=1)
 
         self._text_box.grid(row=0, column=0, sticky="nsew")
 
-    def append_character(self, char: list[GlyphMatch], size: int) -> None:
-        char_index: Final[int] = len(self._text)
-        tag: Final[str] = str(char_index)
-        self._text.append(char)
-
-        self._text_box.insert(tkinter.END, char[0].char, tag)
-        self._text_box.tag_configure(tag, font=("Consolas", size))
-
-        self._text_box.tag_bind(
-            tag, "<Enter>", func=lambda _: self.hover_show(char_index)
-        )
-
-        self._text_box.tag_bind(tag, "<Leave>", func=lambda _: self.hover_hide())
-
-    def append_unknown(self, size: int) -> None:
-        tag: Final[str] = str(len(self._text))
-        self._text.append(None)
-
-        self._text_box.insert(tkinter.END, "�", tag)
-        self._text_box.tag_configure(tag, font=("Consolas", int(size / 2)))
+        # Characters share one tag per font size. Hovering is tracked by a single
+        # motion binding which maps the pointer to a character index.
+        self._font_tags: dict[int, str] = {}
+        self._fonts: dict[int, tkinter.font.Font] = {}
+        self._hovered: int | None = None
+        self._hovered_bbox: tuple[int, int, int, int] | None = None
+        self._text_box.bind("<Motion>", self._hover)
+        self._text_box.bind("<Leave>", lambda _: self.hover_hide())
+
+        # The text box is read only outside of edits.
+        self._edit_depth: int = 0
+        self._text_box.config(state=tkinter.DISABLED)
+
+    @contextmanager
+    def editing(self) -> Iterator[None]:
+        """
+        Description
+        -----------
+        Allow the text box to be edited within the context. Contexts can be nested so a
+        batch of edits only changes the state of the text box once.
+
+        """
+        self._edit_depth += 1
+        if self._edit_depth == 1:
+            self._text_box.config(state=tkinter.NORMAL)
+
+        try:
+            yield
+        finally:
+            self._edit_depth -= 1
+            if self._edit_depth == 0:
+                self._text_box.config(state=tkinter.DISABLED)
+
+    def append_lines(self, lines: list[list[tuple[list[GlyphMatch], int]]]) -> None:
+        """
+        Description
+        -----------
+        Append lines of characters, each given as its matches and font size, with each
+        line followed by a new line. Runs of characters sharing a font size are joined
+        and all of the lines are inserted with a single call.
+
+        """
+        args: list[str] = []
+        run: list[str] = []
+        run_tag: str = ""
+
+        for line in lines:
+            for char, size in line:
+                tag = self._font_tag(size)
+                if tag != run_tag and len(run) != 0:
+                    args += ["".join(run), run_tag]
+                    run.clear()
+
+                run.append(char[0].char)
+                run_tag = tag
+
+            # New lines are left untagged.
+            if len(run) != 0:
+                args += ["".join(run), run_tag]
+                run.clear()
+            args += ["\n", ""]
+
+            self._text.extend(char for char, _ in line)
+            self._line_starts.append(len(self._text))
+
+        if len(args) != 0:
+            with self.editing():
+                self._text_box.insert(tkinter.END, *args)
+
+    def _font_tag(self, size: int) -> str:
+        tag = self._font_tags.get(size)
+        if tag is None:
+            tag = f"font-{size}"
+            font = tkinter.font.Font(self._text_box, family="Consolas", size=size)
+            self._text_box.tag_configure(tag, font=font)
+
+            # Named fonts are deleted along with their Font object, so keep it.
+            self._fonts[size] = font
+            self._font_tags[size] = tag
+
+        return tag
+
+    def truncate(self, line: int) -> None:
+        """
+        Description
+        -----------
+        Remove every line of text from the given line onward.
+
+        """
+        if line >= len(self._line_starts):
+            return
 
-    def new_line(self) -> None:
-        self._text_box.insert(tkinter.END, "\n")
+        del self._text[self._line_starts[line] :]
+        del self._line_starts[line + 1 :]
+        with self.editing():
+            self._text_box.delete(f"{line + 1}.0", tkinter.END)
 
     def clear(self) -> None:
-        self._text_box.delete("1.0", tkinter.END)
+        with self.editing():
+            self._text_box.delete("1.0", tkinter.END)
         self._text.clear()
+        self._line_starts = [0]
 
     def hover_show(self, index: int) -> None:
         hovered_text = self._text[index]
         if hovered_text is None:
+            if self._tooltip is not None:
+                self._tooltip.hidetip()
             return
 
-        match_count: int = 5 if len(hovered_text) >= 5 else len(hovered_text)
+        text: Final[str] = "".join(
+            f"char: {match.char} | "
+            f"code: U+{match.code_point:04X}  | "
+            f"font: {match.font} | "
+            f"rating: {match.match}\n"
+            for match in hovered_text[:5]
+        )
 
-        text: str = ""
-        for match in hovered_text[:match_count]:
-            text += f"char: {match.char} | "
-            text += f"code: U+{match.code_point:04X}  | "
-            text += f"font: {match.font} | "
-            text += f"rating: {match.match}\n"
+        # The tooltip is only created on the first hover.
+        if self._tooltip is None:
+            self._tooltip = ToolTip(self)
 
-        self._tooltip.text = text
-        self._tooltip.showtip()
+        self._tooltip.show_text(text)
 
     def hover_hide(self) -> None:
-        self._tooltip.hidetip()
+        self._hovered = None
+        self._hovered_bbox = None
+        if self._tooltip is not None:
+            self._tooltip.hidetip()
+
+    def _hover(self, event: Event) -> None:
+        # Most motion events stay within the hovered character, so check its box
+        # before asking Tk what's under the pointer.
+        bbox = self._hovered_bbox
+        if bbox is not None and bbox_contains(bbox, event.x, event.y):
+            return
+
+        hovered: Final = self._char_at(event.x, event.y)
+        if hovered is not None and hovered[0] == self._hovered:
+            self._hovered_bbox = hovered[1]
+            return
+
+        if hovered is None:
+            self.hover_hide()
+            return
+
+        self._hovered, self._hovered_bbox = hovered
+        self.hover_show(hovered[0])
+
+    def _char_at(self, x: int, y: int) -> tuple[int, tuple[int, int, int, int]] | None:
+        """
+        Description
+        -----------
+        Get the index and bounding box of the character under a point in the text box,
+        if any.
+
+        """
+        position: Final = f"@{x},{y}"
+
+        bbox = self._text_box.bbox(position)
+        if bbox is None or not bbox_contains(bbox, x, y):
+            return None
+
+        line, column = (int(i) for i in self._text_box.index(position).split("."))
+        if line > len(self._line_starts):
+            return None
+
+        beg: Final = self._line_starts[line - 1]
+        end: Final = (
+            self._line_starts[line]
+            if line < len(self._line_starts)
+            else len(self._text)
+        )
+
+        return (beg + column, bbox) if beg + column < end else None
 
     def set_scrollbar(self, scrollbar: Scrollbar) -> None:
         self._text_box.config(yscrollcommand=scrollbar.set)
 
     def yview(self, *args) -> None:
+        self.hover_hide()
         self._text_box.yview(*args)
 
     def scroll(self, event: Event):
+        self.hover_hide()
         self._text_box.yview_scroll(int(-1 * (event.delta / 120)), "units")
 
 
-class ToolTip(Hovertip):
+class ToolTip(TooltipBase):
+    # How far the pointer must move, in pixels, before the tooltip is moved with it.
+    _MOVE_THRESHOLD: Final[int] = 2
+
+    def __init__(self, anchor_widget, text: str = "") -> None:
+        # Showing and hiding is driven by the owner rather than by enter and leave
+        # bindings on the anchor.
+        super().__init__(anchor_widget)
+        self.text: str = text
+        self._label: Label | None = None
+        self._position: tuple[int, int] | None = None
+
+    def showcontents(self) -> None:
+        self._label = Label(
+            self.tipwindow,
+            text=self.text,
+            justify=tkinter.LEFT,
+            background="#ffffe0",
+            relief=tkinter.SOLID,
+            borderwidth=1,
+        )
+        self._label.pack()
+
+    def show_text(self, text: str) -> None:
+        """
+        Description
+        -----------
+        Show the tooltip with the given text. If it's already shown the existing
+        window is updated rather than being destroyed and created again.
+
+        """
+        self.text = text
+
+        if self.tipwindow is None or self._label is None:
+            self.showtip()
+            return
+
+        self._label.config(text=text)
+        self.position_window()
+
+    def hidetip(self) -> None:
+        super().hidetip()
+        self._label = None
+        self._position = None
+
     def position_window(self):
         if self.tipwindow is None:
             return
 
         x = self.anchor_widget.winfo_pointerx() + 1
         y = self.anchor_widget.winfo_pointery() - 1
+
+        if self._position is not None:
+            dx, dy = x - self._position[0], y - self._position[1]
+            if abs(dx) + abs(dy) <= self._MOVE_THRESHOLD:
+                return
+
+        self._position = (x, y)
         self.tipwindow.wm_geometry(f"+{x}+{y}")
@@ -1,31 +1,112 @@
 import math
 import json
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Final, Self, Sequence
 
 import cv2 as cv
 import numpy as np
-from numpy import ndarray, uint8
+from numpy import uint8, float32, float64, bool_
 from numpy.typing import NDArray
 
 
+# Hu moments no larger than this are ignored when comparing contours, as by OpenCV.
+MOMENT_EPSILON: Final[float] = 1e-5
+
+
+def hu_signature(moments: NDArray[float64]) -> NDArray[float64]:
+    """
+    Description
+    -----------
+    Transform Hu moments the way cv.matchShapes does before comparing them with
+    CONTOURS_MATCH_I1. Moments the comparison ignores are NaN.
+
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        signature = 1.0 / (np.sign(moments) * np.log10(np.abs(moments)))
+
+    signature[np.abs(moments) <= MOMENT_EPSILON] = np.nan
+    return signature
+
+
+def find_glyph_contours(glyph: NDArray[uint8]) -> Sequence:
+    return cv.findContours(glyph, cv.RETR_LIST, cv.CHAIN_APPROX_NONE)[0]
+
+
 @dataclass
 class Font:
     name: str
     width: int
     height: int
     code_points: list[int]
-    glyphs: list[NDArray[uint8]]
+    glyphs: NDArray[uint8]
+    packed_glyphs: NDArray[uint8] = field(init=False)
+    ink_counts: NDArray[np.intp] = field(init=False)
+    min_ink: int = field(init=False)
     contours: list[Sequence] = field(init=False, default_factory=list)
+    has_contours: NDArray[bool_] = field(init=False)
+    has_moments: NDArray[bool_] = field(init=False)
+    hu_signatures: NDArray[float64] = field(init=False)
+    templates: NDArray[float32] = field(init=False)
+    template_energies: NDArray[float64] = field(init=False)
+    template_norms: NDArray[float64] = field(init=False)
 
     def __post_init__(self) -> None:
-        for glyph in self.glyphs:
-            contours = cv.findContours(glyph, cv.RETR_LIST, cv.CHAIN_APPROX_NONE)[0]
-            self.contours.append(contours)
+        # Glyphs are stored together in one (N, height, width) array.
+        self.glyphs = np.asarray(self.glyphs, dtype=uint8).reshape(
+            (-1, self.height, self.width)
+        )
+
+        # The glyphs at 1 bpp, rows padded to whole bytes, and the number of burned
+        # pixels in each.
+        self.packed_glyphs = np.packbits(self.glyphs != 0, axis=2)
+        self.ink_counts = np.count_nonzero(self.glyphs, axis=(1, 2))
+
+        # OpenCV releases the GIL, so find the glyphs' contours concurrently.
+        with ThreadPoolExecutor() as executor:
+            self.contours = list(executor.map(find_glyph_contours, self.glyphs))
+
+        # Hu moments of each glyph's first contour, used for contour matching. Glyphs
+        # without contours get zeros.
+        self.has_contours = np.array([len(c) != 0 for c in self.contours], dtype=bool_)
+        hu_moments = np.zeros((len(self.glyphs), 7), dtype=float64)
+        for i, contours in enumerate(self.contours):
+            if len(contours) != 0:
+                hu_moments[i] = cv.HuMoments(cv.moments(contours[0])).ravel()
+
+        # Fewest burned pixels of any glyph that can be matched.
+        self.min_ink = int(
+            self.ink_counts[self.has_contours].min(initial=self.height * self.width + 1)
+        )
+
+        self.has_moments = np.any(hu_moments != 0, axis=1)
+        self.hu_signatures = hu_signature(hu_moments)
+
+        # Every glyph flattened into a row of one array, with its sum of squares, used
+        # for template matching against many glyphs at once. Pixels are scaled to
+        # [0, 1] so sums over binary glyphs stay exact in float32.
+        self.templates = self.glyphs.reshape(
+            (len(self.glyphs), self.height * self.width)
+        ) / float32(255)
+        self.template_energies = np.einsum(
+            "ij,ij->i", self.templates, self.templates, dtype=float64
+        )
+        self.template_norms = np.sqrt(self.template_energies)
 
     @classmethod
     def from_json(cls, filepath: Path):
+        # Decoded fonts are cached beside the JSON and reused while it's unchanged.
+        cache: Final = filepath.with_suffix(".npz")
+        if cache.exists() and cache.stat().st_mtime >= filepath.stat().st_mtime:
+            try:
+                return cls.from_npz(cache)
+            except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+                pass
+
         json_data: dict = {}
         with open(filepath, "r") as file:
             json_data = json.load(file)
@@ -39,65 +120,121 @@ class Font:
         json_glyphs: dict[str, list[int]] = json_data["glyphs"]
 
         code_points: list[int] = [int(cp, base=16) for cp in json_glyphs.keys()]
-        glyphs: list[NDArray[uint8]] = []
-        for glyph_data in json_glyphs.values():
-            # Turn the 1 bpp 1D array into 8bpp 2D.
-            data = np.array(glyph_data, dtype=uint8).reshape((-1, row_bytes))
-            data = np.where(np.unpackbits(data, axis=1) != 0, 255, 0).astype(uint8)
-            glyphs.append(data)
 
-        return cls(name, width, height, code_points, glyphs)
+        # Turn the 1 bpp 1D arrays into 8bpp 2D, all at once, dropping the padding
+        # bits at the end of each row. Unpacked bits are 0 or 1 so scale them in place.
+        data = np.array(list(json_glyphs.values()), dtype=uint8)
+        data = data.reshape((len(code_points), height, row_bytes))
+        data = np.unpackbits(data, axis=2, count=width)
+        data *= uint8(255)
 
-    def into_bold(self) -> Self:
-        def make_bold(glyph: NDArray[uint8]) -> NDArray[uint8]:
-            glyph = np.packbits(np.where(glyph != 0, 1, 0).astype(uint8), axis=1)
+        font: Final = cls(name, width, height, code_points, data)
+
+        # Failing to write the cache only means the JSON is decoded again next time.
+        try:
+            font.save_npz(cache)
+        except OSError:
+            pass
 
-            # Apply the bold algorithm, taken from the printer firmware.
-            row_count = glyph.shape[0]
-            for r in range(0, row_count):
-                glyph[r, 1] |= glyph[r, 1] >> 1 | glyph[r, 0] << 7
-                glyph[r, 0] |= glyph[r, 0] >> 1
+        return font
 
-            return np.where(np.unpackbits(glyph, axis=1) != 0, 255, 0).astype(uint8)
+    @classmethod
+    def from_npz(cls, filepath: Path):
+        """
+        Description
+        -----------
+        Load a font saved by save_npz.
+
+        """
+        with np.load(filepath) as data:
+            return cls(
+                str(data["name"]),
+                int(data["width"]),
+                int(data["height"]),
+                data["code_points"].tolist(),
+                data["glyphs"],
+            )
+
+    def save_npz(self, filepath: Path) -> None:
+        """
+        Description
+        -----------
+        Save the font's decoded glyphs so it can be loaded without parsing JSON. The
+        file is written beside the destination then moved into place, so an
+        interrupted save never leaves a partial file behind.
+
+        """
+        file, temp = tempfile.mkstemp(suffix=".npz", dir=filepath.parent)
+        try:
+            with os.fdopen(file, "wb") as stream:
+                np.savez(
+                    stream,
+                    name=self.name,
+                    width=self.width,
+                    height=self.height,
+                    code_points=np.array(self.code_points, dtype=np.int64),
+                    glyphs=self.glyphs,
+                )
+
+            os.replace(temp, filepath)
+        except BaseException:
+            os.unlink(temp)
+            raise
 
+    def into_bold(self) -> Self:
         name: Final[str] = self.name + "-bold"
-        bold_glyphs: list[NDArray[uint8]] = [make_bold(glyph) for glyph in self.glyphs]
 
-        return Font(name, self.width, self.height, self.code_points, bold_glyphs)
+        # Work on a copy of every glyph's packed (height, row_bytes) rows.
+        glyphs = self.packed_glyphs.copy()
+
+        # Apply the bold algorithm, taken from the printer firmware, to every row of
+        # every glyph at once.
+        glyphs[..., 1] |= glyphs[..., 1] >> 1 | glyphs[..., 0] << 7
+        glyphs[..., 0] |= glyphs[..., 0] >> 1
+
+        glyphs = np.unpackbits(glyphs, axis=2, count=self.width)
+        glyphs *= uint8(255)
+
+        return Font(name, self.width, self.height, self.code_points, glyphs)
 
     def show_char(self, code_point: int) -> None:
         cv.imshow(f"{self.name} : {code_point}", self.glyphs[code_point])
         cv.waitKey()
 
     def show(self, glyphs_per_row: int = 32, grid: bool = False) -> None:
-        rows: list[ndarray] = []
-        row_count = math.ceil(len(self.glyphs) / glyphs_per_row)
-
-        for i in range(row_count):
-            beg, end = glyphs_per_row * i, glyphs_per_row * (i + 1)
-            row_glyphs = self.glyphs[beg:end]
-
-            # Add vertical grid lines if nescessary.
-            if grid:
-                for i in range(0, (len(row_glyphs) * 2) + 1, 2):
-                    row_glyphs.insert(i, np.full((self.height, 1), 255, dtype=uint8))
-
-            rows.append(np.hstack(row_glyphs, dtype=uint8))
-
-        # Check if the final row needs some padding.
-        row_width = glyphs_per_row * self.width
+        row_count: Final = math.ceil(len(self.glyphs) / glyphs_per_row)
+
+        # Each glyph is drawn into its tile of a single canvas. With a grid, tiles are
+        # separated by, and the canvas bordered by, a line 1 pixel wide.
+        line: Final[int] = 1 if grid else 0
+        tile_width: Final[int] = self.width + line
+        tile_height: Final[int] = self.height + line
+
+        tiles: Final = np.zeros(
+            (row_count * glyphs_per_row, tile_height, tile_width), dtype=uint8
+        )
+        tiles[: len(self.glyphs), line:, line:] = self.glyphs
+
+        # Lay the tiles out in rows by swapping the tile row and tile y axes.
+        canvas: Final = np.zeros(
+            (row_count * tile_height + line, glyphs_per_row * tile_width + line),
+            dtype=uint8,
+        )
+        canvas[: row_count * tile_height, : glyphs_per_row * tile_width] = (
+            tiles.reshape((row_count, glyphs_per_row, tile_height, tile_width))
+            .transpose((0, 2, 1, 3))
+            .reshape((row_count * tile_height, glyphs_per_row * tile_width))
+        )
+
+        # Add the grid lines if nescessary. Vertical lines only run up to the last
+        # glyph in each row.
         if grid:
-            row_width += glyphs_per_row + 1
+            canvas[::tile_height, :] = 255
 
-        if rows[-1].shape[1] < row_width:
-            padding_width = row_width - rows[-1].shape[1]
-            padding = np.zeros((self.height, padding_width), dtype=uint8)
-            rows[-1] = np.hstack((rows[-1], padding), dtype=uint8)
-
-        # Add horizontal grid lines if nescessary.
-        if grid:
-            for i in range(0, (len(rows) * 2) + 1, 2):
-                rows.insert(i, np.full((1, row_width), 255, dtype=uint8))
+            for row in range(row_count):
+                count = min(len(self.glyphs) - row * glyphs_per_row, glyphs_per_row)
+                y = row * tile_height + line
+                canvas[y : y + self.height, : count * tile_width + 1 : tile_width] = 255
 
-        cv.imshow("Font", np.vstack(rows, dtype=uint8))
+        cv.imshow("Font", canvas)
         cv.waitKey()
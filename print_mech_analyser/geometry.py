@@ -3,11 +3,14 @@ from typing import Self
 
 import numpy as np
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Point:
     x: int
     y: int
 
+    def as_tuple(self) -> tuple[int, int]:
+        return (self.x, self.y)
+
     def __add__(self, rhs: Self) -> Self:
         return Point(self.x + rhs.x, self.y + rhs.y)
 
@@ -15,7 +18,7 @@ class Point:
         return Point(self.x - rhs.x, self.y - rhs.y)
 
 
-@dataclass
+@dataclass(slots=True)
 class Span:
     beg: int
     end: int
@@ -28,7 +31,7 @@ class Span:
         return slice(self.beg, self.end)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class BoundingBox:
     p1: Point
     p2: Point
@@ -1,7 +1,15 @@
+import hashlib
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import cache, partial
+from pathlib import Path
 from typing import Final, Self
 
 import numpy as np
+from numpy import uint8
+from numpy.typing import NDArray
 
 import print_mech_analyser.parse.space as parse_space
 import print_mech_analyser.parse.glyph as parse_glyph
@@ -11,6 +19,18 @@ from print_mech_analyser.geometry import Span
 from print_mech_analyser.parse.glyph import GlyphMatch
 from print_mech_analyser.parse.space import VerticalSpace, UnknownSpace, GlyphSpace
 
+# Where the contents of parsed printouts are cached, keyed by printout and fonts.
+CACHE_DIR: Final = Path.home() / ".cache" / "print-mech-analyser"
+
+# Part of every cache key. Increase it whenever parsing or the format of the cached
+# contents changes, so results from an older parser aren't reused.
+CACHE_VERSION: Final[int] = 1
+
+# Shared by all parsing, so the worker threads are only started once.
+executor: Final = ThreadPoolExecutor(
+    max_workers=os.cpu_count(), thread_name_prefix="parse-glyph"
+)
+
 ################################
 
 
@@ -29,6 +49,36 @@ class PrintoutDescriptor:
 
         return self
 
+    @classmethod
+    def cached(cls, printout: Printout, fonts: list[Font]) -> Self:
+        """
+        Description
+        -----------
+        Create a descriptor for a printout, reusing the parse of an identical printout
+        with the same fonts if one has been cached on disk. Otherwise the printout is
+        parsed and the result cached.
+
+        """
+        path: Final = CACHE_DIR / f"{cache_key(printout, fonts)}.pickle"
+
+        try:
+            with open(path, "rb") as file:
+                return cls(printout, pickle.load(file), fonts)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            # A missing, unreadable or outdated cache just means parsing again.
+            pass
+
+        self = cls.new(printout, fonts)
+
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            with open(path, "wb") as file:
+                pickle.dump(self.contents, file)
+        except OSError:
+            pass
+
+        return self
+
     def extend(self, extension: Printout) -> None:
         self.printout.extend(extension)
 
@@ -37,13 +87,14 @@ class PrintoutDescriptor:
             self.printout.length,
         )
 
-        self.contents = self.contents[:-1]
-
         # Need to offset the new space.
         space = parse_space.from_printout(self.printout, roi=new_slice_roi)
         space = parse_unknown(self.printout, space, self.fonts)
         space = constrain_whitespace(space)
-        self.contents.extend(space)
+
+        # Replace the contents in one assignment so readers never see them part way
+        # through being updated.
+        self.contents = self.contents[:-1] + space
 
     def as_dict(self) -> dict[str, list[dict]]:
         return {"fonts": [], "content": [vs.as_dict() for vs in self.contents]}
@@ -52,35 +103,101 @@ class PrintoutDescriptor:
 ################################
 
 
+def cache_key(printout: Printout, fonts: list[Font]) -> str:
+    """
+    Description
+    -----------
+    Hash a printout's image along with the names and glyphs of the fonts it's parsed
+    with and the cache version, so that changing any of them gives a different key.
+
+    """
+    image: Final = np.asarray(printout)
+
+    digest: Final = hashlib.blake2b(digest_size=16)
+    digest.update(f"v{CACHE_VERSION}".encode())
+    digest.update(str(image.shape).encode())
+    digest.update(np.ascontiguousarray(image).tobytes())
+
+    for font in fonts:
+        digest.update(font.name.encode())
+        digest.update(np.ascontiguousarray(font.glyphs).tobytes())
+
+    return digest.hexdigest()
+
+
 def parse_unknown(
     printout: Printout,
     space: list[VerticalSpace],
     fonts: list[Font],
 ) -> list[VerticalSpace]:
     result: list[VerticalSpace] = space.copy()
+    image: Final = np.asarray(printout)
+
+    # Spaces too big for every font are never matched, so don't queue them. Lines too
+    # tall for every font are skipped without looking at their contents.
+    max_height: Final = max((font.height * 1.5 for font in fonts), default=-1)
+    max_width: Final = max((font.width * 1.5 for font in fonts), default=-1)
+
+    unknownspaces: Final = [
+        (y, x)
+        for y, vert in enumerate(space)
+        if len(vert) <= max_height
+        for x, hori in enumerate(vert.contents)
+        if type(hori) is UnknownSpace and len(hori) <= max_width
+    ]
+
+    # Each space is matched independently, and the OpenCV and NumPy work involved
+    # releases the GIL, so match them concurrently.
+    glyphs: Final = executor.map(
+        partial(parse_glyph_space, image, fonts),
+        [space[y] for y, _ in unknownspaces],
+        [x for _, x in unknownspaces],
+    )
+
+    for (y, x), glyph in zip(unknownspaces, glyphs):
+        if glyph is not None:
+            result[y][x] = glyph
 
-    for y, vert in enumerate(space):
-        horispaces = enumerate(vert.contents)
-        unknownspaces = [(x, hs) for x, hs in horispaces if type(hs) is UnknownSpace]
+    return result
 
-        for x, hori in unknownspaces:
-            bbox: Final = vert.get_bbox(x)
 
-            matches: list[GlyphMatch] = []
-            for font in fonts:
-                # If the object is significantly bigger than a glyph, skip it.
-                if len(vert) > (font.height * 1.5) or len(hori) > (font.width * 1.5):
-                    continue
+def parse_glyph_space(
+    image: NDArray[uint8], fonts: list[Font], vert: VerticalSpace, x: int
+) -> GlyphSpace | None:
+    """
+    Description
+    -----------
+    Match an unknown horizontal space against the glyphs of each font.
 
-                matches.extend(parse_glyph.from_image(np.array(printout), bbox, font))
+    Returns
+    -------
+    GlyphSpace | None
+        The space with its matches, best first, or None if nothing matched.
 
-            if len(matches) == 0:
-                continue
+    """
+    hori: Final = vert[x]
+    bbox: Final = vert.get_bbox(x)
 
-            matches.sort(key=lambda m: m.match)
-            result[y][x] = GlyphSpace(hori.span, matches)
+    # The character's contours don't depend on the font, so find them once, and only
+    # if some font gets as far as contour matching.
+    contours: Final = cache(partial(parse_glyph.find_contours, image, bbox))
 
-    return result
+    matches: list[GlyphMatch] = []
+    for font in fonts:
+        # If the object is significantly bigger than a glyph, skip it.
+        if len(vert) > (font.height * 1.5) or len(hori) > (font.width * 1.5):
+            continue
+
+        # Unknown space always contains burned pixels.
+        matches.extend(
+            parse_glyph.from_image(image, bbox, font, has_ink=True, contours=contours)
+        )
+
+    if len(matches) == 0:
+        return None
+
+    matches.sort(key=lambda m: m.match)
+    return GlyphSpace(hori.span, matches)
 
 
 def constrain_whitespace(space: list[VerticalSpace]) -> list[VerticalSpace]:
@@ -89,23 +206,49 @@ def constrain_whitespace(space: list[VerticalSpace]) -> list[VerticalSpace]:
     for y, vert in enumerate(space):
         vert_spans: list[Span] = []
 
-        horispaces = enumerate(vert.contents)
-        horispaces = [(x, hor) for x, hor in horispaces if type(hor) is GlyphSpace]
-        horispaces = [(x, hor) for x, hor in horispaces if hor.matches[0].match < 0.001]
+        # Glyph spaces with an exact match, found in one pass over the line.
+        horispaces = [
+            (x, hor)
+            for x, hor in enumerate(vert.contents)
+            if type(hor) is GlyphSpace
+            and hor.matches[0].match < parse_glyph.EXACT_THRESHOLD
+        ]
 
+        claimed: Span | None = None
         for x, hori in horispaces:
-            # Constrain the space.
             match_hori_span = hori.matches[0].pos.horizontal_span
             match_vert_span = hori.matches[0].pos.vertical_span
 
-            result[y][x].span = match_hori_span
+            # A character split across several spaces, such as '"', matches the same
+            # glyph from each of them. Keep the first and drop the rest.
+            if claimed is not None and match_hori_span.beg < claimed.end:
+                result[y][x].span = Span(claimed.end, claimed.end)
+                continue
 
-            # Constrain adjascent space.
-            if x > 0:
-                result[y][x - 1].span.end = match_hori_span.beg
+            claimed = match_hori_span
+
+            # Constrain the space.
+            result[y][x].span = match_hori_span
 
-            if x < (len(vert.contents) - 1):
-                result[y][x + 1].span.beg = match_hori_span.end
+            # Constrain adjascent space. A narrow glyph may overlap several spaces
+            # either side of it, so trim each of them.
+            preceding = result[y].contents[:x]
+            if len(preceding) != 0:
+                preceding[-1].span.end = match_hori_span.beg
+
+            for hor in reversed(preceding[:-1]):
+                if hor.span.end <= match_hori_span.beg:
+                    break
+                hor.span.end = match_hori_span.beg
+
+            following = result[y].contents[x + 1 :]
+            if len(following) != 0:
+                following[0].span.beg = match_hori_span.end
+
+            for hor in following[1:]:
+                if hor.span.beg >= match_hori_span.end:
+                    break
+                hor.span.beg = match_hori_span.end
 
             vert_spans.append(match_vert_span)
 
@@ -1,21 +1,24 @@
 import math
 from dataclasses import dataclass
-from typing import Final, Sequence
-from functools import partial
+from typing import Callable, Final, Sequence
 
 import numpy as np
-from numpy import uint8
+from numpy import uint8, float32, float64
 from numpy.typing import NDArray
 
 import cv2 as cv
 
-from print_mech_analyser.font import Font
+from print_mech_analyser.font import Font, hu_signature
 from print_mech_analyser.geometry import Point
 from print_mech_analyser.geometry import BoundingBox as BBox
 
 TEMPLATE_THRESHOLD: Final[float] = 100
 CONTOUR_THRESHOLD: Final[float] = 0.1
 
+# Template scores are sums of squared differences between 8 bit pixels so are whole
+# numbers. Anything below a half is an exact match, allowing for rounding.
+EXACT_THRESHOLD: Final[float] = 0.5
+
 
 @dataclass(slots=True)
 class GlyphMatch:
@@ -34,12 +37,43 @@ class GlyphMatch:
         }
 
 
-def from_image(image: NDArray[uint8], bbox: BBox, font: Font) -> list[GlyphMatch]:
+def from_image(
+    image: NDArray[uint8],
+    bbox: BBox,
+    font: Font,
+    has_ink: bool | None = None,
+    contours: Callable[[], Sequence] | None = None,
+) -> list[GlyphMatch]:
     """
     Description
     -----------
     Parse a character in an image.
 
+    Parameters
+    ----------
+    image: NDArray[uint8]
+        Image containing the character.
+
+    bbox: BBox
+        Bounds of the character within the image.
+
+    font: Font
+        Font to match the character against.
+
+    has_ink: bool | None
+        Whether the bounds contain any burned pixels, if already known. The image is
+        searched for them otherwise.
+
+    contours: Callable[[], Sequence] | None
+        Function returning the contours of the character, as find_contours does. Lets
+        a cached result be shared when matching against several fonts. They're found
+        here otherwise.
+
+    Returns
+    -------
+    list[GlyphMatch]
+        Glyphs matching the character.
+
     """
     # Pad the image if nescessary.
     xpad: Final[int] = font.width - bbox.width if bbox.width < font.width else 0
@@ -47,19 +81,22 @@ def from_image(image: NDArray[uint8], bbox: BBox, font: Font) -> list[GlyphMatch
 
     image_bbox: Final = BBox(Point(0, 0), Point(image.shape[1], image.shape[0]))
     bbox_padded: Final = BBox(
-        bbox.p1 - Point(xpad, ypad),
-        bbox.p2 + Point(xpad, ypad),
+        Point(bbox.p1.x - xpad, bbox.p1.y - ypad),
+        Point(bbox.p2.x + xpad, bbox.p2.y + ypad),
     ).clamp(image_bbox)
 
     character: Final[NDArray[uint8]] = image[bbox_padded.slice]
 
     # If image is whitespace whitespace.
     # TODO return list of possible whitespace chars instead.
-    if not np.any(character):
+    if has_ink is None:
+        has_ink = bool(np.any(character))
+
+    if not has_ink:
         spaces = math.floor(image.shape[1] / font.width)
         return [
             GlyphMatch(
-                char="".join([" " for _ in range(spaces)]),
+                char=" " * spaces,
                 font=font.name,
                 code_point=0x20,
                 match=0.0,
@@ -67,98 +104,190 @@ def from_image(image: NDArray[uint8], bbox: BBox, font: Font) -> list[GlyphMatch
             )
         ]
 
-    image_contrs = cv.findContours(
-        image[bbox.slice], cv.RETR_LIST, cv.CHAIN_APPROX_NONE
-    )[0]
-
-    # Find a set of matches using the relatively fast contour matching technique.
-    # Contour matching is scale and rotation invariant so may give some false
-    # positives.
-    match_contrs = partial(contour_similarity, image_contrs)
-
-    matches = zip(font.code_points, font.glyphs, font.contours)
-    matches = [m for m in matches if len(m[2]) != 0]
-    matches = [m + (match_contrs(m[2]),) for m in matches]
-    matches = [m for m in matches if m[3] < CONTOUR_THRESHOLD]
-
-    # Refine the match set using template matching.
-    match_temp = partial(template_similarity, character)
+    # Skip contour matching entirely when the character has too few burned pixels to
+    # match any glyph. Every burned pixel of a glyph must also be burned in the
+    # character for the template match to pass.
+    ink: Final[int] = cv.countNonZero(character)
+    if ink < font.min_ink:
+        return []
 
-    matches = [m + (match_temp(m[1]),) for m in matches]
-    matches = [m for m in matches if m[4][0] < TEMPLATE_THRESHOLD]
+    # A glyph can't be found in an image smaller than it, such as the first few rows
+    # of a printout.
+    if bbox_padded.width < font.width or bbox_padded.height < font.height:
+        return []
 
-    ########
+    image_contrs: Final = find_contours(image, bbox) if contours is None else contours()
 
+    # Find a set of matches using the relatively fast contour matching technique.
+    # Contour matching is scale and rotation invariant so may give some false
+    # positives. The image is compared against every glyph at once.
+    image_hu: Final = cv.HuMoments(cv.moments(image_contrs[0])).ravel()
+    similarities: Final = contour_similarities(image_hu, font)
+
+    # Only glyphs passing the contour match are visited in Python. Glyphs with more
+    # burned pixels than the character are rejected too.
+    candidates: Final = np.flatnonzero(
+        font.has_contours
+        & (similarities < CONTOUR_THRESHOLD)
+        & (font.ink_counts <= ink)
+    )
+
+    if len(candidates) == 0:
+        return []
+
+    # Refine the match set using template matching. Every candidate is scored at
+    # every position in one operation.
     result_width: int = bbox_padded.width - font.width + 1
     result_height: int = bbox_padded.height - font.height + 1
 
-    ########
+    scores: Final = template_similarities(
+        character, font, candidates, TEMPLATE_THRESHOLD
+    )
+    best: Final = scores.argmin(axis=1)
+    best_scores: Final = scores[np.arange(len(candidates)), best]
+
+    # Matches differ only in where the glyph was found in the padded image, so work
+    # out the rest of the translation to the main image once. The padded image's
+    # center is offset by the match from the bbox image, less half a glyph.
+    center: Final = bbox_padded.center
+    half_width: Final[int] = int(font.width / 2)
+    half_height: Final[int] = int(font.height / 2)
+    origin_x: Final[int] = (
+        center.x - (bbox.p1.x - bbox_padded.p1.x) + int(result_width / 2) - half_width
+    )
+    origin_y: Final[int] = (
+        center.y - (bbox.p1.y - bbox_padded.p1.y) + int(result_height / 2) - half_height
+    )
 
     char_matches: list[GlyphMatch] = []
-    for cp, _, _, match_cont, match_temp in matches:
-        match_top_left: Point = Point(match_temp[1][0], match_temp[1][1])
-        match_center: Point = Point(
-            match_top_left.x + int(result_width / 2),
-            match_top_left.y + int(result_height / 2),
-        )
-
-        # Translate from coords in the padded image to coords in the bbox image.
-        transform_vector = Point(
-            bbox.p1.x - bbox_padded.p1.x, bbox.p1.y - bbox_padded.p1.y
-        )
+    for i, score, pos in zip(candidates, best_scores.tolist(), best.tolist()):
+        if score >= TEMPLATE_THRESHOLD:
+            continue
 
-        match_center = match_center - transform_vector
-
-        # Translate form the bbox image to the main image.
-        match_center = bbox_padded.center + match_center
-
-        corner_offset = Point(
-            int(font.width / 2),
-            int(font.height / 2),
-        )
-
-        p1 = match_center - corner_offset
-        p2 = match_center + corner_offset
+        cp: int = font.code_points[i]
+        y, x = divmod(pos, result_width)
+        x1, y1 = origin_x + x, origin_y + y
 
         char_matches.append(
             GlyphMatch(
                 char=chr(cp),
                 font=font.name,
                 code_point=cp,
-                match=match_temp[0],
-                pos=BBox(p1, p2).clamp(image_bbox),
+                match=score,
+                pos=BBox(
+                    Point(x1, y1), Point(x1 + 2 * half_width, y1 + 2 * half_height)
+                ).clamp(image_bbox),
             )
         )
 
     return char_matches
 
 
-def contour_similarity(contours1: Sequence, contours2: Sequence) -> float:
+def find_contours(image: NDArray[uint8], bbox: BBox) -> Sequence:
     """
     Description
     -----------
-    Find a set of matches using the relatively fast contour matching technique.
-    Contour matching is scale and rotation invariant so may give some false positives.
+    Find the contours of a character in an image, as used for contour matching.
+
+    """
+    return cv.findContours(image[bbox.slice], cv.RETR_LIST, cv.CHAIN_APPROX_NONE)[0]
+
 
+def contour_similarities(moments: NDArray[float64], font: Font) -> NDArray[float64]:
     """
+    Description
+    -----------
+    Compare the Hu moments of a contour against those of every glyph in a font using
+    the same measure as cv.matchShapes with CONTOURS_MATCH_I1. The glyphs' moments are
+    transformed once when the font is loaded, so only the contour's are transformed
+    here.
 
-    return cv.matchShapes(contours1[0], contours2[0], cv.CONTOURS_MATCH_I1, 0.0)
+    Parameters
+    ----------
+    moments: NDArray[float64]
+        Hu moments of the contour, shape (7,).
 
-    def match_contour(c1, c2) -> float:
-        return cv.matchShapes(c1, c2, cv.CONTOURS_MATCH_I1, 0.0)
+    font: Font
+        Font to compare against.
 
-    if len(contours1) == 0 or len(contours2) == 0:
-        return 0
+    Returns
+    -------
+    NDArray[float64]
+        Similarity to each glyph, shape (N,). Lower is more similar.
 
-    match_sum = sum(match_contour(c1, c2) for c1, c2 in zip(contours1, contours2))
-    return match_sum / len(contours1)
+    """
+    # Moments ignored by the comparison are NaN in either signature.
+    differences: Final = np.abs(font.hu_signatures - hu_signature(moments))
+    similarities: Final = np.nansum(differences, axis=1)
 
+    # OpenCV treats a contour with no moments as completely different to one with.
+    similarities[font.has_moments != np.any(moments != 0)] = np.finfo(float64).max
 
-def template_similarity(
-    image: NDArray[uint8], template: NDArray[uint8]
-) -> tuple[float, tuple[int, int]]:
-    result = cv.matchTemplate(image, template, cv.TM_SQDIFF)
-    min, _, pos, _ = cv.minMaxLoc(result)
+    return similarities
 
-    # cvlog.image(cvlog.Level.INFO, result, msg=f"score: {min}, position: {pos}")
-    return min, pos
+
+def template_similarities(
+    image: NDArray[uint8], font: Font, indices: NDArray, threshold: float = np.inf
+) -> NDArray[float64]:
+    """
+    Description
+    -----------
+    Template match several of a font's glyphs against an image at once, using the same
+    measure as cv.matchTemplate with TM_SQDIFF. Each window of the image is compared
+    with each glyph as one matrix product, expanding the squared difference into
+    sum(I^2) - 2 * sum(I * T) + sum(T^2).
+
+    Parameters
+    ----------
+    image: NDArray[uint8]
+        Image to search. Must be at least as large as the font's glyphs.
+
+    font: Font
+        Font the glyphs belong to.
+
+    indices: NDArray
+        Indices of the glyphs to match.
+
+    threshold: float
+        Glyphs that cannot score below this anywhere are rejected before matching,
+        using the bound sum((I - T)^2) >= (|I| - |T|)^2. Their similarities are inf.
+
+    Returns
+    -------
+    NDArray[float64]
+        Similarity of each glyph at each position, shape (len(indices), positions).
+        Positions are in row-major order. Lower is more similar.
+
+    """
+    windows: Final = np.lib.stride_tricks.sliding_window_view(
+        image, (font.height, font.width)
+    )
+    windows_flat: Final = windows.reshape((-1, font.height * font.width)).astype(
+        float32
+    )
+    windows_flat /= float32(255)
+
+    # Work is done with pixels scaled to [0, 1], like the font's templates, and
+    # scaled back at the end.
+    scale: Final[float] = 255.0**2
+    window_energies: Final = np.einsum(
+        "ij,ij->i", windows_flat, windows_flat, dtype=float64
+    )
+
+    # Find the distance between each glyph's norm and the nearest window norm.
+    window_norms: Final = np.sort(np.sqrt(window_energies))
+    norms: Final = font.template_norms[indices]
+    nearest: Final = np.searchsorted(window_norms, norms)
+    above: Final = window_norms[np.minimum(nearest, len(window_norms) - 1)]
+    below: Final = window_norms[np.maximum(nearest - 1, 0)]
+    bounds: Final = np.minimum(np.abs(above - norms), np.abs(below - norms)) ** 2
+
+    scores: Final = np.full((len(indices), len(windows_flat)), np.inf)
+    viable: Final = np.flatnonzero(bounds * scale < threshold)
+
+    correlations: Final = font.templates[indices[viable]] @ windows_flat.T
+    scores[viable] = window_energies - 2.0 * correlations
+    scores[viable] += font.template_energies[indices[viable], np.newaxis]
+    scores *= scale
+
+    return scores
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import SupportsIndex
+from typing import Final, SupportsIndex
 
 import numpy as np
 from numpy.typing import NDArray
@@ -169,33 +169,87 @@ def from_printout(printout: Printout, roi: Span | None = None) -> list[VerticalS
     print = printout if roi is None else printout[roi.slice]
     roi_offset = 0 if roi is None else roi.beg
 
-    burned_rows: NDArray = np.any(print, axis=1)
+    image: Final[NDArray] = np.asarray(print)
+    words: Final = as_words(image)
+    burned_rows: NDArray = np.bitwise_or.reduce(words, axis=1) != 0
+
+    offsets = run_offsets(burned_rows)
+
+    # Find the burned columns of every vertical space in a single pass over the image,
+    # rather than reducing each space separately.
+    if len(image) > 0:
+        burned_words: Final = np.bitwise_or.reduceat(words, offsets, axis=0)
+        burned_cols: NDArray = burned_words.view(np.uint8) != 0
+        burned_spans: list[bool] = burned_rows[offsets].tolist()
+    else:
+        burned_cols = np.zeros((1, image.shape[1]), dtype=np.bool_)
+        burned_spans = [False]
+
+    begs: Final = offsets + roi_offset
+    ends: Final = np.append(offsets[1:], len(image)) + roi_offset
+
+    # Spaces between lines of print contain nothing, so they're a single span of
+    # whitespace without needing to look at their columns.
+    vertical_spaces: list[VerticalSpace] = [
+        VerticalSpace(
+            span=Span(beg, end),
+            contents=(
+                parse_burned_columns(cols)
+                if burned
+                else [WhiteSpace(Span(0, image.shape[1]))]
+            ),
+        )
+        for beg, end, cols, burned in zip(begs, ends, burned_cols, burned_spans)
+    ]
 
-    offsets = np.where(burned_rows[:-1] != burned_rows[1:])[0] + 1
-    offsets = np.insert(offsets, 0, 0)
+    return vertical_spaces
 
-    vertical_spaces: list[VerticalSpace] = []
-    for i in range(0, len(offsets)):
-        beg: int = offsets[i]
-        end: int = offsets[i + 1] if (i + 1) < len(offsets) else print.length
 
-        vertical_spaces.append(
-            VerticalSpace(
-                span=Span(beg + roi_offset, end + roi_offset),
-                contents=parse_horizontal(print[beg:end, :]),
-            )
-        )
+def parse_burned_columns(burned_cols: NDArray) -> list[HorizontalSpace]:
+    """
+    Description
+    -----------
+    Split a line of printout into horizontal spaces, given which of its columns
+    contain any burned pixels.
 
-    return vertical_spaces
+    """
+    offsets = run_offsets(burned_cols)
+    ends = np.append(offsets[1:], len(burned_cols))
+
+    burned: Final = burned_cols[offsets].tolist()
 
+    return [
+        UnknownSpace(Span(beg, end)) if is_burned else WhiteSpace(Span(beg, end))
+        for beg, end, is_burned in zip(offsets, ends, burned)
+    ]
 
-def parse_horizontal(printout: Printout) -> list[HorizontalSpace]:
-    burned_cols: NDArray = np.any(printout, axis=0)
 
-    offsets = np.where(burned_cols[:-1] != burned_cols[1:])[0] + 1
-    offsets = np.insert(offsets, 0, 0)
+def run_offsets(mask: NDArray) -> NDArray:
+    """
+    Description
+    -----------
+    Find where each run of equal values in a 1D mask begins.
 
-    spans = [Span(beg, end) for beg, end in zip(offsets[:-1], offsets[1:])]
-    spans.append(Span(offsets[-1], printout.width))
+    Returns
+    -------
+    NDArray
+        Offset of the start of every run, beginning with 0.
+
+    """
+    transitions: Final = np.flatnonzero(mask[:-1] != mask[1:]) + 1
+    return np.concatenate(([0], transitions))
+
+
+def as_words(image: NDArray) -> NDArray:
+    """
+    Description
+    -----------
+    View the rows of an image as 64 bit words, when their layout allows, so that
+    bitwise reductions over it handle 8 pixels per operation. Viewing the result of
+    such a reduction as uint8 gives back one value per pixel column.
+
+    """
+    if image.dtype == np.uint8 and image.flags.c_contiguous and image.shape[1] % 8 == 0:
+        return image.view(np.uint64)
 
-    return [UnknownSpace(s) if burned_cols[s.beg] else WhiteSpace(s) for s in spans]
+    return image
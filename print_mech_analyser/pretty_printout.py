@@ -1,3 +1,4 @@
+import functools
 from pathlib import Path
 from typing import Final, Optional, Self
 
@@ -7,11 +8,30 @@ from numpy import uint8
 from numpy.typing import NDArray
 
 from print_mech_analyser.printout import Printout
-from print_mech_analyser.geometry import Span, BoundingBox
+from print_mech_analyser.geometry import BoundingBox
 
 Color: Final = tuple[int, int, int]
 
 
+CHANNELS: Final = np.arange(3)
+
+
+@functools.lru_cache(maxsize=16)
+def highlight_table(color: Color) -> NDArray[uint8]:
+    """
+    Description
+    -----------
+    Build a lookup table of the highlighted value of each channel value, for a
+    highlight colour. Indexed by value then channel. Each value is blended half and
+    half with the colour, as by cv.addWeighted.
+
+    """
+    values: Final = np.repeat(np.arange(256, dtype=uint8)[:, np.newaxis], 3, axis=1)
+    highlight: Final = np.full(values.shape, color, dtype=uint8)
+
+    return cv.addWeighted(values, 0.5, highlight, 0.5, 1.0)
+
+
 class PrettyPrintout(np.lib.mixins.NDArrayOperatorsMixin):
     __slots__ = ["_img"]
 
@@ -25,14 +45,15 @@ class PrettyPrintout(np.lib.mixins.NDArrayOperatorsMixin):
 
     @classmethod
     def from_printout(cls, printout: Printout) -> Self:
-        return cls(
-            np.where(
-                np.expand_dims(printout._img, 2) == 0, (255, 255, 255), (0, 0, 0)
-            ).astype(uint8)
-        )
+        # Write unburnt pixels as white straight into the uint8 RGB image in one pass.
+        image: Final = np.empty((*printout._img.shape, 3), dtype=uint8)
+        np.multiply(np.expand_dims(printout._img, 2) == 0, uint8(255), out=image)
+
+        return cls(image)
 
     def __array__(self, dtype=uint8) -> NDArray[uint8]:
-        return self._img.astype(dtype)
+        # Return the image itself, rather than a copy, when no conversion is needed.
+        return self._img if self._img.dtype == dtype else self._img.astype(dtype)
 
     def __array_ufunc__(self, ufunc, method, *inputs, **kwargs) -> Self:
         inputs = [i._img if isinstance(i, self.__class__) else i for i in inputs]
@@ -71,34 +92,43 @@ class PrettyPrintout(np.lib.mixins.NDArrayOperatorsMixin):
     def shape(self) -> tuple[int, ...]:
         return self._img.shape
 
-    def highlight_strip(self, span: Span, color: tuple[int, int, int]) -> None:
-        """
-        Description
-        -----------
-        Highlight a horizontal strip in the printout.
-
-        """
-        area: Final = np.array(self[span.slice, :])
-        highlight: Final = np.full(area.shape, color, dtype=uint8)
-
-        self._img[span.slice, :] = cv.addWeighted(area, 0.5, highlight, 0.5, 1.0)
-
-    def highlight_area(self, bounds: BoundingBox, color: Color) -> None:
+    def highlight_areas(self, bounds: list[BoundingBox], color: Color) -> None:
         """
         Description
         -----------
-        Highlight a rectangular area in the printout.
+        Highlight many non-overlapping rectangular areas in the printout at once. The
+        areas are marked in a mask built from a 2D difference array, then every masked
+        pixel is blended through a lookup table.
 
         """
-        area: Final = np.array(self[bounds.slice])
-        highlight: Final = np.full(area.shape, color, dtype=uint8)
+        if len(bounds) == 0:
+            return
 
-        highlighted_area = cv.addWeighted(area, 0.5, highlight, 0.5, 1.0)
+        length, width = self.size
+
+        corners = np.array([(b.p1.y, b.p1.x, b.p2.y, b.p2.x) for b in bounds])
+        corners = np.clip(corners, 0, (length, width, length, width))
+        corners = corners[
+            (corners[:, 0] < corners[:, 2]) & (corners[:, 1] < corners[:, 3])
+        ]
+        y1, x1, y2, x2 = corners.T
+
+        # Mark each area's corners then integrate to fill it in.
+        diff: Final = np.zeros((length + 1, width + 1), dtype=np.int32)
+        np.add.at(diff, (y1, x1), 1)
+        np.add.at(diff, (y1, x2), -1)
+        np.add.at(diff, (y2, x1), -1)
+        np.add.at(diff, (y2, x2), 1)
+        mask: Final = np.cumsum(np.cumsum(diff, axis=0), axis=1)[:length, :width] > 0
+
+        area: Final = self._img[mask]
+        if area.size == 0:
+            return
 
-        self._img[bounds.slice] = highlighted_area
+        self._img[mask] = highlight_table(color)[area, CHANNELS]
 
     def save(self, path: Path) -> None:
-        cv.imwrite(str(path.absolute()), np.array(self))
+        cv.imwrite(str(path.absolute()), np.asarray(self))
 
     def show(
         self, window_name: Optional[str] = None, wait: bool = False, split: bool = False
@@ -11,7 +11,7 @@ BLACK: Final = 0
 
 
 class Printout(np.lib.mixins.NDArrayOperatorsMixin):
-    __slots__ = ["_img"]
+    __slots__ = ["_img", "_buffer"]
 
     _WINODW_NAME_INDEX: int = 0
 
@@ -21,8 +21,12 @@ class Printout(np.lib.mixins.NDArrayOperatorsMixin):
 
         self._img: NDArray[uint8] = img
 
+        # Storage grown by extend. The image is a view of its leading rows.
+        self._buffer: NDArray[uint8] | None = None
+
     def __array__(self, dtype=uint8) -> NDArray[uint8]:
-        return self._img.astype(dtype)
+        # Return the image itself, rather than a copy, when no conversion is needed.
+        return self._img if self._img.dtype == dtype else self._img.astype(dtype)
 
     def __array_ufunc__(self, ufunc, method, *inputs, **kwargs) -> Self:
         inputs = [i._img if isinstance(i, self.__class__) else i for i in inputs]
@@ -72,14 +76,35 @@ class Printout(np.lib.mixins.NDArrayOperatorsMixin):
         if image.dtype != uint8:
             raise ValueError("Image must be 8bpp")
 
-        return cls(image.astype(uint8))
+        return cls(image)
 
     @classmethod
     def blank(cls, width: int, length: int) -> Self:
         return Printout(np.zeros((length, width), dtype=uint8))
 
     def extend(self, printout: Self) -> None:
-        self._img = np.vstack((self._img, printout), dtype=uint8)
+        """
+        Extend the printout with the lines of another. Lines are copied into a buffer
+        which grows geometrically, so extending doesn't copy the whole printout each
+        time.
+
+        Parameters
+        ----------
+        printout : Self
+            Printout to append to the end of this one.
+
+        """
+        extension: Final = np.asarray(printout, dtype=uint8)
+
+        beg: Final[int] = self.length
+        end: Final[int] = beg + extension.shape[0]
+
+        if self._buffer is None or end > self._buffer.shape[0]:
+            self._buffer = np.empty((2 * end, self.width), dtype=uint8)
+            self._buffer[:beg] = self._img
+
+        self._buffer[beg:end] = extension
+        self._img = self._buffer[:end]
 
     @property
     def length(self) -> int:
@@ -98,7 +123,7 @@ class Printout(np.lib.mixins.NDArrayOperatorsMixin):
         return self._img.shape
 
     def save(self, path: Path) -> None:
-        cv.imwrite(str(path.absolute()), np.array(self))
+        cv.imwrite(str(path.absolute()), np.asarray(self))
 
     def show(self, window_name: Optional[str] = None, wait: bool = False) -> None:
         if window_name is None: